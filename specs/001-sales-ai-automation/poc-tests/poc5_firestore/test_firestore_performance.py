@@ -16,6 +16,7 @@ Requirements:
 - google-cloud-firestore package
 """
 
+import asyncio
 import os
 import time
 import json
@@ -26,6 +27,8 @@ from dataclasses import dataclass, asdict
 import statistics
 import uuid
 
+from aiolimiter import AsyncLimiter
+from google.api_core import retry_async
 from google.cloud import firestore
 from google.oauth2 import service_account
 
@@ -43,6 +46,7 @@ class OperationMetrics:
     success: bool
     document_count: int = 1
     error_message: str = None
+    retry_count: int = 0
 
 @dataclass
 class CostEstimate:
@@ -92,23 +96,52 @@ class FirestorePerformanceTester:
         """
         if credentials_path:
             credentials = service_account.Credentials.from_service_account_file(credentials_path)
-            self.db = firestore.Client(project=project_id, credentials=credentials)
+            self.db = firestore.AsyncClient(project=project_id, credentials=credentials)
         else:
-            self.db = firestore.Client(project=project_id)
+            self.db = firestore.AsyncClient(project=project_id)
 
         self.test_collection = f"poc_test_{uuid.uuid4().hex[:8]}"
         self.metrics: List[OperationMetrics] = []
 
+        # Token-bucket limiter shared by all test phases. Firestore's default
+        # quota is 10K writes/sec, so 500 ops/sec is conservative; unlike the
+        # old time.sleep() delays, token waits happen outside the measured
+        # window, so scheduling jitter stays out of the latency numbers.
+        self.limiter = AsyncLimiter(max_rate=500, time_period=1.0)
+
         logger.info(f"Initialized Firestore client for project: {project_id}")
         logger.info(f"Test collection: {self.test_collection}")
 
+    @staticmethod
+    def _make_retry(retry_counter: List[int]) -> retry_async.AsyncRetry:
+        """
+        Build a per-operation retry policy for transient errors.
+
+        3 attempts with exponential backoff, capped at a 2s deadline so
+        retried operations cannot masquerade as very-high-latency successes.
+        Each failed attempt increments retry_counter[0] so retries stay
+        visible in the recorded metrics.
+        """
+        def _count(exc: Exception):
+            retry_counter[0] += 1
+
+        return retry_async.AsyncRetry(
+            initial=0.1,
+            maximum=1.0,
+            multiplier=2.0,
+            deadline=2.0,
+            predicate=retry_async.if_transient_error,
+            on_error=_count
+        )
+
     def _record_metric(self, metric: OperationMetrics):
         """Record operation metric"""
         self.metrics.append(metric)
         status = "✅" if metric.success else "❌"
-        logger.info(f"[{metric.operation_id}] {metric.operation_type.upper()} {status} - {metric.latency_ms:.0f}ms")
+        retries = f" ({metric.retry_count} retries)" if metric.retry_count else ""
+        logger.info(f"[{metric.operation_id}] {metric.operation_type.upper()} {status} - {metric.latency_ms:.0f}ms{retries}")
 
-    def test_write_performance(self, num_writes: int = 50) -> List[OperationMetrics]:
+    async def test_write_performance(self, num_writes: int = 50) -> List[OperationMetrics]:
         """Test write operations performance"""
         logger.info(f"\n=== Test 1: Write Performance ({num_writes} documents) ===")
 
@@ -116,6 +149,8 @@ class FirestorePerformanceTester:
 
         for i in range(num_writes):
             op_id = f"write_{i+1}"
+            retries = [0]
+            await self.limiter.acquire()
             start_time = time.time()
 
             try:
@@ -144,7 +179,7 @@ class FirestorePerformanceTester:
                     }
                 }
 
-                doc_ref.set(doc_data)
+                await doc_ref.set(doc_data, retry=self._make_retry(retries))
 
                 latency = (time.time() - start_time) * 1000
 
@@ -153,15 +188,13 @@ class FirestorePerformanceTester:
                     operation_type="write",
                     collection=self.test_collection,
                     latency_ms=latency,
-                    success=True
+                    success=True,
+                    retry_count=retries[0]
                 )
 
                 self._record_metric(metric)
                 results.append(metric)
 
-                # Small delay to avoid rate limits
-                time.sleep(0.05)
-
             except Exception as e:
                 latency = (time.time() - start_time) * 1000
                 logger.error(f"[{op_id}] Write failed: {e}")
@@ -172,7 +205,8 @@ class FirestorePerformanceTester:
                     collection=self.test_collection,
                     latency_ms=latency,
                     success=False,
-                    error_message=str(e)
+                    error_message=str(e),
+                    retry_count=retries[0]
                 )
 
                 self._record_metric(metric)
@@ -180,7 +214,7 @@ class FirestorePerformanceTester:
 
         return results
 
-    def test_read_performance(self, num_reads: int = 50) -> List[OperationMetrics]:
+    async def test_read_performance(self, num_reads: int = 50) -> List[OperationMetrics]:
         """Test single document read performance"""
         logger.info(f"\n=== Test 2: Read Performance ({num_reads} reads) ===")
 
@@ -188,12 +222,14 @@ class FirestorePerformanceTester:
 
         for i in range(num_reads):
             op_id = f"read_{i+1}"
-            doc_id = f"analysis_{(i % 50) + 1}"  # Read from existing docs
+            doc_id = f"analysis_{(i % 25) + 1}"  # Read from analysis_1..25 (updates use 26..50)
+            retries = [0]
+            await self.limiter.acquire()
             start_time = time.time()
 
             try:
                 doc_ref = self.db.collection(self.test_collection).document(doc_id)
-                doc = doc_ref.get()
+                doc = await doc_ref.get(retry=self._make_retry(retries))
 
                 latency = (time.time() - start_time) * 1000
 
@@ -202,14 +238,13 @@ class FirestorePerformanceTester:
                     operation_type="read",
                     collection=self.test_collection,
                     latency_ms=latency,
-                    success=doc.exists
+                    success=doc.exists,
+                    retry_count=retries[0]
                 )
 
                 self._record_metric(metric)
                 results.append(metric)
 
-                time.sleep(0.02)
-
             except Exception as e:
                 latency = (time.time() - start_time) * 1000
                 logger.error(f"[{op_id}] Read failed: {e}")
@@ -220,7 +255,8 @@ class FirestorePerformanceTester:
                     collection=self.test_collection,
                     latency_ms=latency,
                     success=False,
-                    error_message=str(e)
+                    error_message=str(e),
+                    retry_count=retries[0]
                 )
 
                 self._record_metric(metric)
@@ -228,7 +264,7 @@ class FirestorePerformanceTester:
 
         return results
 
-    def test_query_performance(self, num_queries: int = 30) -> List[OperationMetrics]:
+    async def test_query_performance(self, num_queries: int = 30) -> List[OperationMetrics]:
         """Test complex query performance"""
         logger.info(f"\n=== Test 3: Query Performance ({num_queries} queries) ===")
 
@@ -246,11 +282,13 @@ class FirestorePerformanceTester:
         for i in range(num_queries):
             query_type, query_builder = query_types[i % len(query_types)]
             op_id = f"query_{query_type}_{i+1}"
+            retries = [0]
+            await self.limiter.acquire()
             start_time = time.time()
 
             try:
                 query = query_builder()
-                docs = list(query.stream())
+                docs = [doc async for doc in query.stream(retry=self._make_retry(retries))]
 
                 latency = (time.time() - start_time) * 1000
 
@@ -260,14 +298,13 @@ class FirestorePerformanceTester:
                     collection=self.test_collection,
                     latency_ms=latency,
                     success=True,
-                    document_count=len(docs)
+                    document_count=len(docs),
+                    retry_count=retries[0]
                 )
 
                 self._record_metric(metric)
                 results.append(metric)
 
-                time.sleep(0.1)
-
             except Exception as e:
                 latency = (time.time() - start_time) * 1000
                 logger.error(f"[{op_id}] Query failed: {e}")
@@ -278,7 +315,8 @@ class FirestorePerformanceTester:
                     collection=self.test_collection,
                     latency_ms=latency,
                     success=False,
-                    error_message=str(e)
+                    error_message=str(e),
+                    retry_count=retries[0]
                 )
 
                 self._record_metric(metric)
@@ -286,7 +324,7 @@ class FirestorePerformanceTester:
 
         return results
 
-    def test_update_performance(self, num_updates: int = 20) -> List[OperationMetrics]:
+    async def test_update_performance(self, num_updates: int = 20) -> List[OperationMetrics]:
         """Test update operations performance"""
         logger.info(f"\n=== Test 4: Update Performance ({num_updates} updates) ===")
 
@@ -294,15 +332,17 @@ class FirestorePerformanceTester:
 
         for i in range(num_updates):
             op_id = f"update_{i+1}"
-            doc_id = f"analysis_{(i % 50) + 1}"
+            doc_id = f"analysis_{(i % 25) + 26}"  # Update analysis_26..50 (reads use 1..25)
+            retries = [0]
+            await self.limiter.acquire()
             start_time = time.time()
 
             try:
                 doc_ref = self.db.collection(self.test_collection).document(doc_id)
-                doc_ref.update({
+                await doc_ref.update({
                     "status": "updated",
                     "updatedAt": firestore.SERVER_TIMESTAMP
-                })
+                }, retry=self._make_retry(retries))
 
                 latency = (time.time() - start_time) * 1000
 
@@ -311,14 +351,13 @@ class FirestorePerformanceTester:
                     operation_type="update",
                     collection=self.test_collection,
                     latency_ms=latency,
-                    success=True
+                    success=True,
+                    retry_count=retries[0]
                 )
 
                 self._record_metric(metric)
                 results.append(metric)
 
-                time.sleep(0.05)
-
             except Exception as e:
                 latency = (time.time() - start_time) * 1000
                 logger.error(f"[{op_id}] Update failed: {e}")
@@ -329,7 +368,8 @@ class FirestorePerformanceTester:
                     collection=self.test_collection,
                     latency_ms=latency,
                     success=False,
-                    error_message=str(e)
+                    error_message=str(e),
+                    retry_count=retries[0]
                 )
 
                 self._record_metric(metric)
@@ -382,7 +422,7 @@ class FirestorePerformanceTester:
             total_cost=total_cost
         )
 
-    def cleanup_test_data(self):
+    async def cleanup_test_data(self):
         """Delete test collection"""
         logger.info(f"\n=== Cleanup: Deleting test collection {self.test_collection} ===")
 
@@ -390,8 +430,8 @@ class FirestorePerformanceTester:
             docs = self.db.collection(self.test_collection).stream()
             deleted = 0
 
-            for doc in docs:
-                doc.reference.delete()
+            async for doc in docs:
+                await doc.reference.delete()
                 deleted += 1
 
             logger.info(f"Deleted {deleted} test documents")
@@ -399,15 +439,18 @@ class FirestorePerformanceTester:
         except Exception as e:
             logger.error(f"Cleanup failed: {e}")
 
-    def run_all_tests(self) -> TestResults:
+    async def run_all_tests(self) -> TestResults:
         """Run all performance tests"""
         logger.info("Starting POC 5: Firestore Performance & Cost Tests")
 
-        # Run tests
-        write_metrics = self.test_write_performance(num_writes=50)
-        read_metrics = self.test_read_performance(num_reads=50)
-        query_metrics = self.test_query_performance(num_queries=30)
-        update_metrics = self.test_update_performance(num_updates=20)
+        # Writes must finish first to populate data; the remaining phases are
+        # independent (disjoint doc ID ranges), so overlap them on one channel
+        write_metrics = await self.test_write_performance(num_writes=50)
+        read_metrics, query_metrics, update_metrics = await asyncio.gather(
+            self.test_read_performance(num_reads=50),
+            self.test_query_performance(num_queries=30),
+            self.test_update_performance(num_updates=20),
+        )
 
         # Calculate statistics
         write_latencies = [m.latency_ms for m in write_metrics if m.success]
@@ -455,7 +498,7 @@ class FirestorePerformanceTester:
         )
 
         # Cleanup
-        self.cleanup_test_data()
+        await self.cleanup_test_data()
 
         return results
 
@@ -517,7 +560,7 @@ def save_results(results: TestResults, output_path: str):
 
     logger.info(f"Results saved to {output_path}")
 
-def main():
+async def main():
     """Main test execution"""
     project_id = os.getenv("GCP_PROJECT_ID")
     credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
@@ -527,7 +570,7 @@ def main():
         return
 
     tester = FirestorePerformanceTester(project_id, credentials_path)
-    results = tester.run_all_tests()
+    results = await tester.run_all_tests()
 
     print_results(results)
 
@@ -535,4 +578,4 @@ def main():
     save_results(results, output_path)
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,20 +1,22 @@
+import asyncio
 import os
 import logging
 from dotenv import load_dotenv
-from slack_bolt import App
-from slack_bolt.adapter.socket_mode import SocketModeHandler
+from slack_bolt.async_app import AsyncApp
+from slack_bolt.adapter.socket_mode.aiohttp import AsyncSocketModeHandler
 from slack_sdk.errors import SlackApiError
 
 # --- Initialization ---
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 
-# Initialize the Slack App
-app = App(token=os.environ.get("SLACK_BOT_TOKEN"))
+# Initialize the Slack App (async: handlers run on the event loop, so slow
+# Slack API round-trips don't block other incoming events)
+app = AsyncApp(token=os.environ.get("SLACK_BOT_TOKEN"))
 
 # --- File Shared Event Handler ---
 @app.event("file_shared")
-def handle_file_shared(client, event, logger):
+async def handle_file_shared(client, event, logger):
     """
     This listener is triggered when a file is shared in a channel the bot is in.
     It posts a message with a button to collect metadata for the file.
@@ -29,26 +31,38 @@ def handle_file_shared(client, event, logger):
             logger.warning(f"file_shared event missing channel or event_ts: {event}")
             return
 
-        # Get file info to check the file type
-        file_info = client.files_info(file=file_id).get("file")
-        file_type = file_info.get("filetype")
-        file_name = file_info.get("name")
-        
         # Define supported audio types
         supported_audio_types = ["m4a", "mp3", "wav", "flac"]
 
+        # Short-circuit obvious non-audio shares on the filename alone —
+        # no Slack API call needed for the ignore decision
+        raw_name = event.get("file", {}).get("name", "")
+        if raw_name and not raw_name.lower().endswith(tuple(f".{t}" for t in supported_audio_types)):
+            logger.info(f"Ignoring non-audio file: {file_id} ({raw_name})")
+            return
+
+        # Newer event payloads carry the file sub-object inline, but it may be
+        # a bare {"id": ...} stub; only pay the files.info round-trip when the
+        # metadata we need is missing
+        file_info = event.get("file") or {}
+        if "filetype" not in file_info:
+            file_info = (await client.files_info(file=file_id)).get("file", {})
+        file_type = file_info.get("filetype")
+        file_name = file_info.get("name")
+
         if file_type in supported_audio_types:
             logger.info(f"Audio file shared: {file_id} ({file_name}) by user: {user_id}. Posting interactive message.")
             
-            # Add a reaction to the file message to acknowledge receipt
-            client.reactions_add(
+            # Acknowledge with a reaction and post the interactive message
+            # concurrently — the two calls are independent
+            reaction = client.reactions_add(
                 channel=channel_id,
                 timestamp=event_ts, # Timestamp of the file_shared event message
                 name="eyes" # Or any other suitable emoji
             )
 
             # Post a message with a button in a thread to the file_shared message
-            client.chat_postMessage(
+            message = client.chat_postMessage(
                 channel=channel_id,
                 thread_ts=event_ts, # Reply in a thread to the file_shared message
                 text=f"我偵測到一個音檔: *{file_name}*。請點擊下方按鈕補充客戶資訊以開始分析。",
@@ -74,6 +88,7 @@ def handle_file_shared(client, event, logger):
                     }
                 ]
             )
+            await asyncio.gather(reaction, message)
         else:
             logger.info(f"Ignoring non-audio file: {file_id} of type {file_type}")
 
@@ -85,19 +100,19 @@ def handle_file_shared(client, event, logger):
 
 # --- Button Click Handler ---
 @app.action("add_file_details_button")
-def handle_add_file_details_button(ack, body, client, logger):
+async def handle_add_file_details_button(ack, body, client, logger):
     """
     This listener is triggered when the '新增檔案細節' button is clicked.
     It opens a modal to collect metadata.
     """
-    ack() # Acknowledge the button click
+    await ack() # Acknowledge the button click
     
     file_id = body["actions"][0]["value"] # Get file_id from the button's value
     trigger_id = body["trigger_id"] # Get trigger_id from the payload
     
     try:
         # Open a modal to collect metadata
-        client.views_open(
+        await client.views_open(
             trigger_id=trigger_id,
             view={
                 "type": "modal",
@@ -139,12 +154,12 @@ def handle_add_file_details_button(ack, body, client, logger):
 
 # --- Modal Submission Handler ---
 @app.view("upload_audio_modal")
-def handle_modal_submission(ack, body, client, view, logger):
+async def handle_modal_submission(ack, body, client, view, logger):
     """
     This handler is triggered when the metadata modal is submitted.
     It retrieves the file_id from private_metadata and submitted values.
     """
-    ack() # Acknowledge the view submission
+    await ack() # Acknowledge the view submission
 
     user_id = body["user"]["id"]
     
@@ -164,7 +179,7 @@ def handle_modal_submission(ack, body, client, view, logger):
     # TODO: Add logic to start the backend processing with this information
     # For now, send a confirmation message to the user in a DM
     try:
-        client.chat_postMessage(
+        await client.chat_postMessage(
             channel=user_id, # Send as a DM to the user
             text=f"感謝！我們已收到您檔案的詳細資訊，將很快開始處理。\n- 檔案 ID: `{file_id}`\n- 客戶編號: `{customer_id}`\n- 店名: `{store_name}`"
         )
@@ -182,7 +197,11 @@ def handle_modal_submission(ack, body, client, view, logger):
 
 
 # --- Main Execution ---
+async def main():
+    handler = AsyncSocketModeHandler(app, os.environ.get("SLACK_APP_TOKEN"))
+    await handler.start_async()
+
+
 if __name__ == "__main__":
     logging.info("Starting Slack App in Socket Mode...")
-    handler = SocketModeHandler(app, os.environ.get("SLACK_APP_TOKEN"))
-    handler.start()
+    asyncio.run(main())
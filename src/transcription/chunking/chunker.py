@@ -8,6 +8,8 @@ import logging
 from typing import List, Dict
 from pathlib import Path
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -80,48 +82,34 @@ class AudioChunker:
                 "has_overlap_end": False
             }]
 
-        chunks = []
-        current_start = 0.0
-        chunk_id = 0
-
-        while current_start < total_duration:
-            # 計算片段結束點
-            ideal_end = current_start + self.target_duration
-            chunk_end = min(ideal_end, total_duration)
+        # 向量化計算所有片段邊界：起點以 (target - overlap) 為步長等差排列，
+        # 終點裁切至音檔長度，一次算完再物化成 dict
+        step = self.target_duration - self.overlap
+        starts = np.arange(0.0, total_duration, step)
+        ends = np.minimum(starts + self.target_duration, total_duration)
 
-            # 檢查剩餘長度
-            remaining = total_duration - chunk_end
+        # 剩餘長度遞減：找到第一個「剩餘不足 min_duration」的片段，
+        # 將其延伸到音檔結尾並截斷後續片段（對應逐片合併規則）
+        tail = np.flatnonzero(total_duration - ends < self.min_duration)
+        last = int(tail[0]) if len(tail) else len(starts) - 1
+        starts = starts[:last + 1]
+        ends = ends[:last + 1]
+        ends[-1] = total_duration
 
-            # 如果剩餘部分太短，合併到當前片段
-            if 0 < remaining < self.min_duration:
-                chunk_end = total_duration
+        durations = ends - starts
+        n = len(starts)
 
-            chunk_duration = chunk_end - current_start
-
-            # 創建片段
-            chunk = {
-                "chunk_id": chunk_id,
-                "start": current_start,
-                "end": chunk_end,
-                "duration": chunk_duration,
-                "has_overlap_start": chunk_id > 0,
-                "has_overlap_end": chunk_end < total_duration
+        chunks = [
+            {
+                "chunk_id": i,
+                "start": float(starts[i]),
+                "end": float(ends[i]),
+                "duration": float(durations[i]),
+                "has_overlap_start": i > 0,
+                "has_overlap_end": i < n - 1
             }
-
-            chunks.append(chunk)
-
-            logger.debug(
-                f"Created chunk {chunk_id}: "
-                f"{current_start:.1f}s - {chunk_end:.1f}s "
-                f"({chunk_duration:.1f}s)"
-            )
-
-            # 移動到下一個片段（包含重疊）
-            if chunk_end >= total_duration:
-                break
-
-            current_start = chunk_end - self.overlap
-            chunk_id += 1
+            for i in range(n)
+        ]
 
         logger.info(f"Created {len(chunks)} chunks")
         self._print_chunk_summary(chunks)
@@ -169,16 +157,18 @@ class AudioChunker:
         input_path = Path(audio_path)
         output_filename = f"{input_path.stem}_chunk_{chunk_id:03d}.wav"
 
-        # 構建 ffmpeg 命令
-        ffmpeg_cmd = (
-            f'ffmpeg -i "{audio_path}" '
-            f'-ss {start} '
-            f'-t {duration} '
-            f'-ar 16000 '  # 重採樣至 16kHz
-            f'-ac 1 '      # 轉為單聲道
-            f'-c:a pcm_s16le '  # WAV 格式
-            f'"{output_filename}"'
-        )
+        # 構建 ffmpeg 參數列表（直接餵給 subprocess.run，免 shell 轉義）。
+        # -ss 放在 -i 之前走 keyframe seek，避免從頭解碼到起點
+        ffmpeg_args = [
+            "ffmpeg",
+            "-ss", str(start),
+            "-i", str(audio_path),
+            "-t", str(duration),
+            "-ar", "16000",      # 重採樣至 16kHz
+            "-ac", "1",          # 轉為單聲道
+            "-c:a", "pcm_s16le", # WAV 格式
+            output_filename
+        ]
 
         return {
             "input": str(audio_path),
@@ -186,7 +176,50 @@ class AudioChunker:
             "start": start,
             "duration": duration,
             "chunk_id": chunk_id,
-            "ffmpeg_command": ffmpeg_cmd
+            "ffmpeg_args": ffmpeg_args,
+            "ffmpeg_command": " ".join(ffmpeg_args)
+        }
+
+    def create_segment_plan(
+        self,
+        audio_path: str,
+        chunks: List[Dict]
+    ) -> Dict:
+        """
+        生成單次 ffmpeg segment 模式的提取計畫
+
+        逐片段呼叫 ffmpeg 會重複解碼輸入 N 次；segment 模式一次解碼、
+        依切點輸出所有片段（頻寬最優：O(duration) 而非 O(N·duration)）。
+        注意：segment 模式的切點不含重疊，適用 overlap_duration=0 的情境。
+
+        Args:
+            audio_path: 原始音檔路徑
+            chunks: 片段資訊列表（由 create_chunks 生成）
+
+        Returns:
+            Dict: {"outputs": [...], "ffmpeg_args": [...], "ffmpeg_command": "..."}
+        """
+        input_path = Path(audio_path)
+        output_pattern = f"{input_path.stem}_chunk_%03d.wav"
+
+        # segment_times 是各片段的起點（不含 0）
+        segment_times = ",".join(str(c["start"]) for c in chunks[1:])
+
+        ffmpeg_args = [
+            "ffmpeg",
+            "-i", str(audio_path),
+            "-f", "segment",
+            "-segment_times", segment_times,
+            "-ar", "16000",
+            "-ac", "1",
+            "-c:a", "pcm_s16le",
+            output_pattern
+        ]
+
+        return {
+            "outputs": [f"{input_path.stem}_chunk_{c['chunk_id']:03d}.wav" for c in chunks],
+            "ffmpeg_args": ffmpeg_args,
+            "ffmpeg_command": " ".join(ffmpeg_args)
         }
 
 
@@ -16,10 +16,16 @@ def create_diarizer(
     use_auth_token: Optional[str] = None,
     allow_overlap: bool = False,
     model_name: str = "pyannote/speaker-diarization",
+    expected_speakers: Optional[int] = None,
 ) -> Optional[object]:
     """
     Create the best available diarizer implementation.
 
+    Args:
+        expected_speakers: Known number of participants, when the caller has
+            it (e.g. two-party sales calls). Lets the diarizer skip its
+            speaker-count search.
+
     Returns:
         Instance of a diarizer implementing `diarize(audio_path)` and
         `summarize(segments)` methods, or None if no implementation is
@@ -30,10 +36,11 @@ def create_diarizer(
             model_name=model_name,
             use_auth_token=use_auth_token,
             enable_overlap=allow_overlap,
+            expected_speakers=expected_speakers,
         )
     except Exception as exc:  # pragma: no cover - environment dependent
         # Fallback to SpeechBrain-based diarizer if pyannote is unavailable.
         try:
-            return EmbeddingClusterDiarizer()
+            return EmbeddingClusterDiarizer(expected_speakers=expected_speakers)
         except Exception as fallback_exc:
             raise RuntimeError(f"{exc} | {fallback_exc}") from fallback_exc
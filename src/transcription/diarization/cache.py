@@ -0,0 +1,77 @@
+"""
+Filesystem cache for diarization results.
+
+Diarization is the most expensive stage of the pipeline, yet tuning runs
+re-process the same audio with different transcription or merging settings.
+Caching the speaker segments keyed by audio identity plus diarizer
+parameters turns those reruns into a pickle load.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import pickle
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "sales-ai-automation" / "diarization"
+
+
+def resolve_cache_dir(cache: Union[str, Path, None]) -> Optional[Path]:
+    """Map the `cache` constructor argument to a directory (None disables)."""
+    if cache is None:
+        return None
+    if cache == "default":
+        return DEFAULT_CACHE_DIR
+    return Path(cache)
+
+
+def cache_key(audio_path: str, params: Dict) -> str:
+    """Derive a stable key from audio identity and diarizer parameters.
+
+    Hashing the full audio would cost a whole read per lookup, so the key
+    combines the first 1 MB of content with file size and mtime — enough to
+    invalidate on any re-export — plus the parameters that change the output.
+    """
+    path = Path(audio_path)
+    stat = path.stat()
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.read(1 << 20))
+    digest.update(f"{stat.st_size}|{stat.st_mtime_ns}".encode())
+    for name in sorted(params):
+        digest.update(f"|{name}={params[name]}".encode())
+
+    return digest.hexdigest()
+
+
+def load_segments(cache_dir: Path, key: str) -> Optional[List]:
+    """Return cached speaker segments, or None on miss/corruption."""
+    cache_path = cache_dir / f"{key}.pkl"
+    if not cache_path.exists():
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            segments = pickle.load(f)
+        logger.info("Diarization cache hit: %s", cache_path)
+        return segments
+    except Exception as exc:
+        logger.warning("Discarding unreadable diarization cache %s (%s)", cache_path, exc)
+        return None
+
+
+def store_segments(cache_dir: Path, key: str, segments: List) -> None:
+    """Persist speaker segments for later runs (best effort)."""
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_path = cache_dir / f"{key}.pkl"
+        tmp_path = cache_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(segments, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(cache_path)
+    except Exception as exc:
+        logger.warning("Failed to write diarization cache (%s)", exc)
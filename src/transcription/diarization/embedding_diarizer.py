@@ -8,18 +8,117 @@ gated models or external tokens.
 
 from __future__ import annotations
 
+import contextlib
+import hashlib
 import logging
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, List, Optional, Union
 
 import numpy as np
 import torch
 import torchaudio
 import huggingface_hub
 
+from . import cache as diarization_cache
+
+try:  # optional: JIT-compiles the span-merge loop when numba is installed
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional
+    njit = None
+
 
 logger = logging.getLogger(__name__)
 
+
+def _merge_spans(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    labels: np.ndarray,
+    gap_tol: float,
+):
+    """Merge consecutive same-label spans separated by at most gap_tol.
+
+    Operates on contiguous float64/int32 arrays so the state machine runs
+    without per-iteration dict or dataclass overhead, and compiles to native
+    code under numba when available.
+    """
+    n = starts.shape[0]
+    out_starts = np.empty(n, dtype=np.float64)
+    out_ends = np.empty(n, dtype=np.float64)
+    out_labels = np.empty(n, dtype=np.int32)
+
+    count = 0
+    current_label = labels[0]
+    current_start = starts[0]
+    current_end = ends[0]
+
+    for i in range(1, n):
+        if labels[i] == current_label and starts[i] <= current_end + gap_tol:
+            if ends[i] > current_end:
+                current_end = ends[i]
+        else:
+            out_starts[count] = current_start
+            out_ends[count] = current_end
+            out_labels[count] = current_label
+            count += 1
+            current_label = labels[i]
+            current_start = starts[i]
+            current_end = ends[i]
+
+    out_starts[count] = current_start
+    out_ends[count] = current_end
+    out_labels[count] = current_label
+    count += 1
+
+    return out_starts[:count], out_ends[:count], out_labels[:count]
+
+
+if njit is not None:
+    _merge_spans = njit(cache=True)(_merge_spans)
+
+
+def _decode_window(
+    audio_path: str,
+    start_s: float,
+    end_s: float,
+    target_sr: int,
+) -> Optional[np.ndarray]:
+    """Decode one [start_s, end_s] window to mono float32 at target_sr.
+
+    Seeks to the nearest keyframe before start_s and decodes only until
+    end_s, so a long recording never has to be fully loaded or resampled
+    just to embed its speech windows.
+    """
+    import av
+
+    frames = []
+    first_time = None
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=target_sr)
+
+    with av.open(audio_path) as container:
+        stream = container.streams.audio[0]
+        container.seek(int(start_s / stream.time_base), stream=stream)
+        for frame in container.decode(stream):
+            if first_time is None and frame.time is not None:
+                first_time = frame.time
+            for resampled in resampler.resample(frame):
+                frames.append(resampled.to_ndarray().reshape(-1))
+            if frame.time is not None and frame.time >= end_s:
+                break
+
+    if not frames:
+        return None
+
+    samples = np.concatenate(frames)
+
+    # The seek lands on a keyframe at or before start_s; trim the prelude and
+    # clip the tail to the requested window.
+    lead = int(max(0.0, start_s - (first_time or 0.0)) * target_sr)
+    length = int((end_s - start_s) * target_sr)
+    samples = samples[lead:lead + length]
+    return samples if samples.size else None
+
 if not hasattr(torchaudio, "set_audio_backend"):
     def _set_audio_backend_stub(name: str):  # type: ignore
         logger.debug("torchaudio.set_audio_backend stub used (%s)", name)
@@ -63,6 +162,8 @@ class EmbeddingClusterDiarizer:
         max_speakers: int = 4,
         sample_rate: int = 16000,
         window_pad: float = 0.2,
+        cache: Union[str, Path, None] = "default",
+        expected_speakers: Optional[int] = None,
     ):
         try:
             from speechbrain.pretrained import EncoderClassifier  # type: ignore
@@ -72,24 +173,163 @@ class EmbeddingClusterDiarizer:
                 "Install it with `pip install speechbrain`."
             ) from exc
 
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.encoder = EncoderClassifier.from_hparams(
             source="speechbrain/spkrec-ecapa-voxceleb",
             savedir="pretrained_models/spkrec-ecapa-voxceleb",
+            run_opts={"device": self.device},
         )
+
+        # Fuse the ECAPA convolutions where supported; compilation failures
+        # (unsupported backend/ops) just leave the eager model in place.
+        if hasattr(torch, "compile"):
+            try:
+                self.encoder.mods.embedding_model = torch.compile(
+                    self.encoder.mods.embedding_model
+                )
+            except Exception as exc:
+                logger.debug("torch.compile unavailable for encoder (%s)", exc)
         self.max_speakers = max(1, max_speakers)
+        self.expected_speakers = expected_speakers
         self.sample_rate = sample_rate
         self.window_pad = window_pad
+        self.cache_dir = diarization_cache.resolve_cache_dir(cache)
 
     def diarize(
         self,
         audio_path: str,
         transcript_segments: Optional[List[Dict]] = None,
+        waveform: Optional[np.ndarray] = None,
+        sample_rate: Optional[int] = None,
     ) -> List[SpeakerSegment]:
         if not transcript_segments:
             raise RuntimeError(
                 "EmbeddingClusterDiarizer requires transcript segments to infer speakers."
             )
 
+        cache_key = None
+        if self.cache_dir is not None:
+            cache_key = diarization_cache.cache_key(
+                audio_path,
+                {
+                    "max_speakers": self.max_speakers,
+                    "expected_speakers": self.expected_speakers,
+                    "sample_rate": self.sample_rate,
+                    "window_pad": self.window_pad,
+                    # 區間邊界決定每個 embedding 視窗：不同的轉錄設定可能
+                    # 產生相同數量、不同邊界的 segments，必須納入 key
+                    "segments": self._segment_boundaries_digest(transcript_segments),
+                },
+            )
+            cached = diarization_cache.load_segments(self.cache_dir, cache_key)
+            if cached is not None:
+                return cached
+
+        # Pass 1: decode one window per segment. A caller-provided waveform
+        # (e.g. the transcriber's already-decoded buffer) is sliced directly
+        # — no second decode of the file. Otherwise the preferred path
+        # decodes on demand with PyAV (seek + bounded decode), so only the
+        # speech windows ever occupy RAM; without PyAV, fall back to loading
+        # and resampling the full waveform once and slicing it.
+        windows, segment_spans = self._collect_windows(
+            audio_path, transcript_segments, waveform=waveform, sample_rate=sample_rate
+        )
+
+        if not windows:
+            raise RuntimeError("Failed to extract embeddings for diarization.")
+
+        # Pass 2: pad all windows to a common length and embed them in one
+        # batched call — one kernel launch amortized across segments instead
+        # of a model invocation per segment. encode_batch masks the padding
+        # via wav_lens (relative lengths in [0, 1]).
+        lengths = [window.shape[0] for window in windows]
+        max_len = max(lengths)
+        batch = torch.zeros(len(windows), max_len)
+        for i, window in enumerate(windows):
+            batch[i, : window.shape[0]] = window
+
+        # FP16 autocast on GPU halves activation traffic on the ECAPA convs;
+        # CPU stays FP32 where reduced precision rarely wins.
+        autocast = (
+            torch.autocast(device_type="cuda", dtype=torch.float16)
+            if self.device == "cuda"
+            else contextlib.nullcontext()
+        )
+        with torch.inference_mode(), autocast:
+            embedding_batch = self.encoder.encode_batch(
+                batch.to(self.device),
+                wav_lens=torch.tensor(lengths, dtype=torch.float32) / max_len,
+            )
+        embeddings = embedding_batch.squeeze(1).float().cpu().numpy()
+
+        labels = self._cluster_embeddings(embeddings)
+        speaker_segments = self._build_speaker_segments(segment_spans, labels)
+
+        logger.info(
+            "Embedding diarization produced %d speaker segments across %d speakers",
+            len(speaker_segments),
+            len({seg.speaker for seg in speaker_segments}),
+        )
+
+        if cache_key is not None:
+            diarization_cache.store_segments(self.cache_dir, cache_key, speaker_segments)
+
+        return speaker_segments
+
+    @staticmethod
+    def _segment_boundaries_digest(transcript_segments: List[Dict]) -> str:
+        """以毫秒精度雜湊所有 segment 邊界（快取 key 用）"""
+        digest = hashlib.sha256()
+        for segment in transcript_segments:
+            digest.update(
+                f"{float(segment['start']):.3f},{float(segment['end']):.3f};".encode()
+            )
+        return digest.hexdigest()
+
+    def _collect_windows(
+        self,
+        audio_path: str,
+        transcript_segments: List[Dict],
+        waveform: Optional[np.ndarray] = None,
+        sample_rate: Optional[int] = None,
+    ) -> tuple:
+        """Gather one mono 16 kHz tensor per transcript segment window."""
+        windows: List[torch.Tensor] = []
+        segment_spans: List[tuple] = []
+
+        if waveform is not None and (sample_rate or self.sample_rate) == self.sample_rate:
+            tensor = torch.from_numpy(np.ascontiguousarray(waveform))
+            num_samples = tensor.shape[0]
+            for segment in transcript_segments:
+                start = max(0.0, float(segment["start"]) - self.window_pad)
+                end = float(segment["end"]) + self.window_pad
+                start_idx = int(start * self.sample_rate)
+                end_idx = min(int(end * self.sample_rate), num_samples)
+                if end_idx <= start_idx:
+                    continue
+                windows.append(tensor[start_idx:end_idx])
+                segment_spans.append((float(segment["start"]), float(segment["end"])))
+            return windows, segment_spans
+
+        try:
+            import av  # noqa: F401
+            has_av = True
+        except ImportError:
+            has_av = False
+
+        if has_av:
+            for segment in transcript_segments:
+                start = max(0.0, float(segment["start"]) - self.window_pad)
+                end = float(segment["end"]) + self.window_pad
+                if end <= start:
+                    continue
+                samples = _decode_window(audio_path, start, end, self.sample_rate)
+                if samples is None:
+                    continue
+                windows.append(torch.from_numpy(samples))
+                segment_spans.append((float(segment["start"]), float(segment["end"])))
+            return windows, segment_spans
+
         waveform, sr = torchaudio.load(audio_path)
         if waveform.shape[0] > 1:
             waveform = waveform.mean(dim=0, keepdim=True)
@@ -100,40 +340,20 @@ class EmbeddingClusterDiarizer:
             )
             sr = self.sample_rate
 
-        embeddings = []
-        segment_spans = []
-
+        num_samples = waveform.shape[1]
         for segment in transcript_segments:
             start = max(0.0, float(segment["start"]) - self.window_pad)
             end = float(segment["end"]) + self.window_pad
 
             start_idx = int(start * sr)
-            end_idx = int(end * sr)
+            end_idx = min(int(end * sr), num_samples)
             if end_idx <= start_idx:
                 continue
 
-            audio_slice = waveform[:, start_idx:end_idx]
-            if audio_slice.numel() == 0:
-                continue
-
-            with torch.no_grad():
-                embedding = self.encoder.encode_batch(audio_slice)
-            embeddings.append(embedding.squeeze().cpu().numpy())
+            windows.append(waveform[0, start_idx:end_idx])
             segment_spans.append((float(segment["start"]), float(segment["end"])))
 
-        if not embeddings:
-            raise RuntimeError("Failed to extract embeddings for diarization.")
-
-        labels = self._cluster_embeddings(np.vstack(embeddings))
-        speaker_segments = self._build_speaker_segments(segment_spans, labels)
-
-        logger.info(
-            "Embedding diarization produced %d speaker segments across %d speakers",
-            len(speaker_segments),
-            len({seg.speaker for seg in speaker_segments}),
-        )
-
-        return speaker_segments
+        return windows, segment_spans
 
     def summarize(self, segments: List[SpeakerSegment]) -> List[Dict[str, float]]:
         summary: Dict[str, Dict[str, float]] = {}
@@ -150,70 +370,111 @@ class EmbeddingClusterDiarizer:
 
     def _cluster_embeddings(self, embeddings: np.ndarray) -> np.ndarray:
         from sklearn.cluster import AgglomerativeClustering
-        from sklearn.metrics import silhouette_score
 
         if embeddings.shape[0] == 1:
             return np.array([0])
 
-        best_k = 1
-        best_score = -1.0
+        # Cosine geometry throughout: one L2-normalization, one affinity
+        # matrix, reused for both speaker-count selection and clustering.
+        embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        affinity = embeddings @ embeddings.T
 
         max_k = min(self.max_speakers, embeddings.shape[0])
-        for k in range(2, max_k + 1):
-            clustering = AgglomerativeClustering(n_clusters=k)
-            labels = clustering.fit_predict(embeddings)
-            score = silhouette_score(embeddings, labels)
-            if score > best_score:
-                best_score = score
-                best_k = k
+        if self.expected_speakers is not None:
+            # Known participant count: skip estimation entirely.
+            best_k = max(1, min(self.expected_speakers, max_k))
+        else:
+            try:
+                best_k = self._estimate_num_speakers(affinity, max_k)
+            except Exception as exc:
+                logger.debug("Eigengap estimation failed (%s); using silhouette fallback", exc)
+                best_k = self._choose_k_silhouette(1.0 - affinity, max_k)
 
         if best_k == 1:
             return np.zeros(embeddings.shape[0], dtype=int)
 
-        clustering = AgglomerativeClustering(n_clusters=best_k)
-        return clustering.fit_predict(embeddings)
+        clustering = AgglomerativeClustering(
+            n_clusters=best_k, metric="precomputed", linkage="average"
+        )
+        return clustering.fit_predict(1.0 - affinity)
+
+    @staticmethod
+    def _estimate_num_speakers(affinity: np.ndarray, max_k: int) -> int:
+        """Pick the speaker count via the spectral eigengap heuristic.
+
+        The number of near-zero eigenvalues of the normalized graph Laplacian
+        approximates the number of connected components (speakers); the
+        largest gap in the sorted spectrum marks the cut. One eigensolve
+        replaces the old fit-and-score sweep over every candidate k, which
+        re-ran clustering plus an O(N^2) silhouette pass per candidate.
+        """
+        from scipy.linalg import eigh
+        from scipy.sparse.csgraph import laplacian
+
+        lap = laplacian(affinity, normed=True)
+        upper = min(max_k, lap.shape[0] - 1)
+        eigvals = eigh(lap, eigvals_only=True, subset_by_index=[0, upper])
+        return int(np.argmax(np.diff(eigvals))) + 1
+
+    @staticmethod
+    def _choose_k_silhouette(
+        distances: np.ndarray,
+        max_k: int,
+        subsample: int = 512,
+        seed: int = 0,
+    ) -> int:
+        """Silhouette-based fallback for the speaker count.
+
+        Silhouette on the full set costs O(N^2) per candidate k, so segment
+        counts above `subsample` are scored on a uniform subsample — bounded
+        work regardless of call length, at negligible accuracy loss. The
+        cosine distance matrix is computed once by the caller and reused for
+        both clustering and scoring via metric="precomputed".
+        """
+        from sklearn.cluster import AgglomerativeClustering
+        from sklearn.metrics import silhouette_score
+
+        n = distances.shape[0]
+        if n > subsample:
+            idx = np.random.default_rng(seed).choice(n, subsample, replace=False)
+            distances = distances[np.ix_(idx, idx)]
+            n = subsample
+
+        best_k = 1
+        best_score = -1.0
+        for k in range(2, min(max_k, n - 1) + 1):
+            labels = AgglomerativeClustering(
+                n_clusters=k, metric="precomputed", linkage="average"
+            ).fit_predict(distances)
+            score = silhouette_score(distances, labels, metric="precomputed")
+            if score > best_score:
+                best_score = score
+                best_k = k
+
+        return best_k
 
     def _build_speaker_segments(
         self, spans: List[tuple], labels: np.ndarray
     ) -> List[SpeakerSegment]:
-        speaker_map: Dict[int, str] = {}
-        next_id = 1
-        segments: List[SpeakerSegment] = []
+        if not spans:
+            return []
 
-        current_label: Optional[int] = None
-        current_start = 0.0
-        current_end = 0.0
+        # Stage spans into contiguous arrays, run the merge state machine at
+        # array speed, and only materialize dataclasses for the merged output.
+        starts = np.fromiter((s for s, _ in spans), dtype=np.float64, count=len(spans))
+        ends = np.fromiter((e for _, e in spans), dtype=np.float64, count=len(spans))
+        label_arr = np.asarray(labels, dtype=np.int32)
 
-        for (start, end), label in zip(spans, labels):
-            if current_label is None:
-                current_label = label
-                current_start = start
-                current_end = end
-                continue
+        out_starts, out_ends, out_labels = _merge_spans(starts, ends, label_arr, 0.5)
 
-            if label == current_label and start <= current_end + 0.5:
-                current_end = max(current_end, end)
-            else:
-                speaker_name = speaker_map.setdefault(
-                    current_label, f"Speaker {next_id}"
-                )
-                if speaker_name == f"Speaker {next_id}":
-                    speaker_map[current_label] = speaker_name
-                    next_id += 1
-
-                segments.append(
-                    SpeakerSegment(start=current_start, end=current_end, speaker=speaker_name)
-                )
-                current_label = label
-                current_start = start
-                current_end = end
-
-        if current_label is not None:
-            speaker_name = speaker_map.setdefault(
-                current_label, f"Speaker {next_id}"
-            )
+        speaker_map: Dict[int, str] = {}
+        segments: List[SpeakerSegment] = []
+        for start, end, label in zip(out_starts, out_ends, out_labels):
+            label = int(label)
+            if label not in speaker_map:
+                speaker_map[label] = f"Speaker {len(speaker_map) + 1}"
             segments.append(
-                SpeakerSegment(start=current_start, end=current_end, speaker=speaker_name)
+                SpeakerSegment(start=float(start), end=float(end), speaker=speaker_map[label])
             )
 
         return segments
@@ -10,11 +10,15 @@ from __future__ import annotations
 import logging
 import os
 from dataclasses import dataclass
-from typing import List, Optional, Dict
+from pathlib import Path
+from typing import List, Optional, Dict, Union
 
 import numpy as np
+import torch
 import torchaudio
 
+from . import cache as diarization_cache
+
 logger = logging.getLogger(__name__)
 
 if not hasattr(torchaudio, "set_audio_backend"):
@@ -51,6 +55,8 @@ class PyannoteDiarizer:
         model_name: str = "pyannote/speaker-diarization",
         use_auth_token: Optional[str] = None,
         enable_overlap: bool = False,
+        cache: Union[str, Path, None] = "default",
+        expected_speakers: Optional[int] = None,
     ):
         try:
             from pyannote.audio import Pipeline  # type: ignore
@@ -76,44 +82,94 @@ class PyannoteDiarizer:
 
         self.pipeline = Pipeline.from_pretrained(model_name, use_auth_token=token)
         self.enable_overlap = enable_overlap
+        self.expected_speakers = expected_speakers
+        self.model_name = model_name
+        self.cache_dir = diarization_cache.resolve_cache_dir(cache)
 
     def diarize(
         self,
         audio_path: str,
         transcript_segments: Optional[List[Dict]] = None,
+        num_speakers: Optional[int] = None,
+        waveform: Optional[np.ndarray] = None,
+        sample_rate: int = 16000,
     ) -> List[SpeakerSegment]:
         """
         Run speaker diarization on the provided audio file.
 
         Args:
             audio_path: Path to the audio file.
+            num_speakers: Known speaker count; overrides the constructor's
+                `expected_speakers`. When set, the pipeline clusters for that
+                count directly instead of sweeping 1-5 candidates.
+            waveform: Pre-decoded mono float32 waveform at `sample_rate`
+                (e.g. the transcriber's buffer). When provided, diarization
+                runs on it in memory instead of re-reading and re-decoding
+                `audio_path`; the cache is still keyed by the file.
 
         Returns:
             List[SpeakerSegment]: Ordered list of speaker segments.
         """
         logger.info("Running speaker diarization on %s", audio_path)
 
-        diarization = self.pipeline(
-            audio_path, num_speakers=None, min_speakers=1, max_speakers=5
-        )
-
-        segments: List[SpeakerSegment] = []
-        for turn, _, speaker in diarization.itertracks(yield_label=True):
-            segments.append(
-                SpeakerSegment(
-                    start=float(turn.start),
-                    end=float(turn.end),
-                    speaker=str(speaker),
-                )
+        speakers = num_speakers if num_speakers is not None else self.expected_speakers
+
+        cache_key = None
+        if self.cache_dir is not None:
+            cache_key = diarization_cache.cache_key(
+                audio_path,
+                {
+                    "model": self.model_name,
+                    "overlap": self.enable_overlap,
+                    "num_speakers": speakers,
+                },
             )
+            cached = diarization_cache.load_segments(self.cache_dir, cache_key)
+            if cached is not None:
+                return cached
+
+        # pyannote accepts an in-memory mapping, skipping its own file decode
+        if waveform is not None:
+            audio_input = {
+                "waveform": torch.from_numpy(np.ascontiguousarray(waveform)).unsqueeze(0),
+                "sample_rate": sample_rate,
+            }
+        else:
+            audio_input = audio_path
+
+        if speakers is not None:
+            diarization = self.pipeline(audio_input, num_speakers=speakers)
+        else:
+            diarization = self.pipeline(
+                audio_input, num_speakers=None, min_speakers=1, max_speakers=5
+            )
+
+        # Collect turns into a structured array and sort there: numpy sorts
+        # on the float start column directly instead of calling a key
+        # function per element, and the dataclasses are built once from the
+        # already-ordered rows.
+        turns = np.array(
+            [
+                (float(turn.start), float(turn.end), str(speaker))
+                for turn, _, speaker in diarization.itertracks(yield_label=True)
+            ],
+            dtype=[("start", "f8"), ("end", "f8"), ("speaker", "U32")],
+        )
+        turns.sort(order="start")
 
-        segments.sort(key=lambda seg: seg.start)
+        segments: List[SpeakerSegment] = [
+            SpeakerSegment(start=float(row["start"]), end=float(row["end"]), speaker=str(row["speaker"]))
+            for row in turns
+        ]
 
         if not self.enable_overlap:
             segments = self._remove_overlaps(segments)
 
         logger.info("Diarization produced %d segments", len(segments))
 
+        if cache_key is not None:
+            diarization_cache.store_segments(self.cache_dir, cache_key, segments)
+
         return segments
 
     def _remove_overlaps(self, segments: List[SpeakerSegment]) -> List[SpeakerSegment]:
@@ -127,25 +183,31 @@ class PyannoteDiarizer:
             return segments
 
         merged: List[SpeakerSegment] = [segments[0]]
+        previous = segments[0]
 
         for current in segments[1:]:
-            previous = merged[-1]
-            if current.start < previous.end:
-                # Overlap detected – truncate the previous segment
-                if current.end <= previous.end:
-                    # Current segment is entirely within previous; skip it.
-                    continue
-
-                logger.debug(
-                    "Adjusting overlapping segments: %s -> %s",
-                    previous,
-                    current,
-                )
-
-                previous.end = current.start
-                merged.append(current)
-            else:
+            # Sorted input makes non-overlap the common case: decide it with
+            # a single comparison against the tracked tail segment, without
+            # re-indexing merged[-1] every iteration.
+            if current.start >= previous.end:
                 merged.append(current)
+                previous = current
+                continue
+
+            # Overlap detected – truncate the previous segment
+            if current.end <= previous.end:
+                # Current segment is entirely within previous; skip it.
+                continue
+
+            logger.debug(
+                "Adjusting overlapping segments: %s -> %s",
+                previous,
+                current,
+            )
+
+            previous.end = current.start
+            merged.append(current)
+            previous = current
 
         return merged
 
@@ -5,19 +5,85 @@ Results Merging Module
 """
 
 import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Optional
 from pathlib import Path
 
+import numpy as np
+
+try:  # optional: SIMD-optimized similarity with early exit at the threshold
+    from rapidfuzz import fuzz, process as fuzz_process
+except ImportError:  # pragma: no cover - rapidfuzz is optional
+    fuzz = fuzz_process = None
+
+try:  # optional: C JSON serializer, single-buffer output
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+def _offset_chunk(chunk_result: Dict) -> List[Dict]:
+    """平移一個 chunk 內所有 segment/word 的時間戳（可在子行程執行）
+
+    時間戳向量化平移：一次 ufunc 加法取代逐 segment 的純量運算。
+    模組層級函式，ProcessPoolExecutor 可直接 pickle。
+    """
+    chunk_start_offset = chunk_result["chunk"]["start"]
+    segments = chunk_result.get("segments", [])
+    if not segments:
+        return []
+
+    n = len(segments)
+    seg_starts = np.fromiter((s["start"] for s in segments), dtype=np.float64, count=n)
+    seg_ends = np.fromiter((s["end"] for s in segments), dtype=np.float64, count=n)
+    seg_starts += chunk_start_offset
+    seg_ends += chunk_start_offset
+
+    adjusted_segments = []
+    for i, segment in enumerate(segments):
+        adjusted_segment = {
+            "start": seg_starts[i],
+            "end": seg_ends[i],
+            "text": segment["text"],
+            # 正規化文字只算一次，後續 hash 與相似度比對共用
+            "_norm": segment["text"].strip().lower(),
+            "words": []
+        }
+
+        # 調整 word 時間戳（同樣以陣列一次平移）
+        words = segment.get("words")
+        if words:
+            m = len(words)
+            word_starts = np.fromiter((w["start"] for w in words), dtype=np.float64, count=m)
+            word_ends = np.fromiter((w["end"] for w in words), dtype=np.float64, count=m)
+            word_starts += chunk_start_offset
+            word_ends += chunk_start_offset
+            adjusted_segment["words"] = [
+                {
+                    "word": word["word"],
+                    "start": word_starts[j],
+                    "end": word_ends[j],
+                    "probability": word.get("probability", 1.0)
+                }
+                for j, word in enumerate(words)
+            ]
+
+        adjusted_segments.append(adjusted_segment)
+
+    return adjusted_segments
+
+
 class TranscriptionMerger:
     """轉錄結果合併器"""
 
     def __init__(
         self,
         overlap_duration: float = 2.0,
-        similarity_threshold: float = 0.8
+        similarity_threshold: float = 0.8,
+        parallel_workers: Optional[int] = None
     ):
         """
         初始化合併器
@@ -25,9 +91,12 @@ class TranscriptionMerger:
         Args:
             overlap_duration: 片段重疊時間（秒）
             similarity_threshold: 文字相似度閾值（用於去重）
+            parallel_workers: 以多個子行程平移各 chunk 的時間戳；
+                None 為單行程（chunk 數少時序列化成本高於收益）
         """
         self.overlap_duration = overlap_duration
         self.similarity_threshold = similarity_threshold
+        self.parallel_workers = parallel_workers
 
         logger.info(
             f"Transcription Merger initialized - "
@@ -87,64 +156,73 @@ class TranscriptionMerger:
         # 按 chunk_id 排序
         successful_chunks.sort(key=lambda x: x["chunk_id"])
 
+        # 各 chunk 的時間戳平移互相獨立，可先平行處理；
+        # 跨 chunk 的去重依賴前一片段的尾端，留在父行程序列執行
+        if self.parallel_workers:
+            with ProcessPoolExecutor(max_workers=self.parallel_workers) as pool:
+                adjusted_lists = list(pool.map(_offset_chunk, successful_chunks))
+        else:
+            adjusted_lists = [_offset_chunk(r) for r in successful_chunks]
+
         # 合併所有 segments
         merged_segments = []
         previous_chunk = None
-
-        for chunk_result in successful_chunks:
+        # 統計值改以累加器隨迴圈更新，省去合併完成後對全量 segments 的額外掃描
+        total_duration = 0.0
+        total_processing_time = 0.0
+        # 最近 append 的 segments 的正規化文字 hash（與去重 lookback 同步），
+        # 完全相同的重複可 O(1) 判定，不需逐字比對
+        recent_hashes = deque(maxlen=3)
+
+        for chunk_result, adjusted_segments in zip(successful_chunks, adjusted_lists):
             chunk = chunk_result["chunk"]
             chunk_start_offset = chunk["start"]
-            segments = chunk_result.get("segments", [])
+            total_processing_time += chunk_result.get("processing_time", 0)
 
             logger.debug(
                 f"Processing chunk {chunk_result['chunk_id']}: "
-                f"{len(segments)} segments, offset: {chunk_start_offset:.1f}s"
+                f"{len(adjusted_segments)} segments, offset: {chunk_start_offset:.1f}s"
             )
 
-            for segment in segments:
-                # 調整 segment 時間戳（加上片段在原始音檔中的起始位置）
-                adjusted_segment = {
-                    "start": segment["start"] + chunk_start_offset,
-                    "end": segment["end"] + chunk_start_offset,
-                    "text": segment["text"],
-                    "words": []
-                }
+            if not adjusted_segments:
+                previous_chunk = chunk
+                continue
 
-                # 調整 word 時間戳
-                if segment.get("words"):
-                    for word in segment["words"]:
-                        adjusted_segment["words"].append({
-                            "word": word["word"],
-                            "start": word["start"] + chunk_start_offset,
-                            "end": word["end"] + chunk_start_offset,
-                            "probability": word.get("probability", 1.0)
-                        })
+            # 重疊區間對整個 chunk 不變，提到內層迴圈外只算一次
+            check_overlap = bool(previous_chunk) and chunk.get("has_overlap_start", False)
+            overlap_start = chunk_start_offset
+            overlap_end = chunk_start_offset + self.overlap_duration
 
-                # 檢查是否在重疊區域（需要去重）
-                is_in_overlap = False
-                if previous_chunk and chunk.get("has_overlap_start", False):
-                    overlap_start = chunk_start_offset
-                    overlap_end = chunk_start_offset + self.overlap_duration
+            for adjusted_segment in adjusted_segments:
+                norm_hash = hash(adjusted_segment["_norm"])
 
+                # 檢查是否在重疊區域（需要去重）
+                if check_overlap:
                     # 如果 segment 在重疊區域
                     if overlap_start <= adjusted_segment["start"] < overlap_end:
-                        is_in_overlap = True
-                        # 檢查是否與前一個片段的最後幾個 segments 重複
-                        if self._is_duplicate_segment(adjusted_segment, merged_segments):
+                        # 完全相同：hash 快速判定；近似重複：退回逐字檢查
+                        if norm_hash in recent_hashes or self._is_duplicate_segment(
+                            adjusted_segment, merged_segments
+                        ):
                             logger.debug(f"Skipping duplicate segment in overlap: {adjusted_segment['text'][:50]}...")
                             continue
 
                 merged_segments.append(adjusted_segment)
+                recent_hashes.append(norm_hash)
+                if adjusted_segment["end"] > total_duration:
+                    total_duration = adjusted_segment["end"]
 
             previous_chunk = chunk
 
-        # 生成完整文字
-        full_text = " ".join(seg["text"].strip() for seg in merged_segments)
+        # _norm 僅供合併期間去重使用，輸出前移除以維持既有結果格式
+        for seg in merged_segments:
+            del seg["_norm"]
 
-        # 統計資訊
-        total_duration = max(seg["end"] for seg in merged_segments) if merged_segments else 0
-        total_processing_time = sum(r.get("processing_time", 0) for r in successful_chunks)
+        # 生成完整文字（先過濾空字串，避免連續空白；一次 join 完成）
+        text_parts = [t for t in (seg["text"].strip() for seg in merged_segments) if t]
+        full_text = " ".join(text_parts)
 
+        # 統計資訊
         statistics = {
             "total_chunks": len(chunk_results),
             "successful_chunks": len(successful_chunks),
@@ -206,11 +284,21 @@ class TranscriptionMerger:
         # 只檢查最後幾個 segments
         recent_segments = existing_segments[-lookback:]
 
-        segment_text = segment["text"].strip().lower()
-
-        for existing_seg in recent_segments:
-            existing_text = existing_seg["text"].strip().lower()
+        segment_text = segment["_norm"]
+        recent_texts = [seg["_norm"] for seg in recent_segments]
+
+        # RapidFuzz 可用時以相似度比對（C 實作、含 score_cutoff 提前中止），
+        # 同時涵蓋完全相同與重疊區常見的微幅改寫
+        if fuzz_process is not None:
+            match = fuzz_process.extractOne(
+                segment_text,
+                recent_texts,
+                scorer=fuzz.ratio,
+                score_cutoff=self.similarity_threshold * 100,
+            )
+            return match is not None
 
+        for existing_text in recent_texts:
             # 完全相同
             if segment_text == existing_text:
                 return True
@@ -256,33 +344,62 @@ class TranscriptionMerger:
         with open(output_file, "w", encoding="utf-8") as f:
             f.write(result["full_text"])
 
+    @staticmethod
+    def _format_timestamps_batch(seconds: List[float], millis_sep: str) -> List[str]:
+        """以整數陣列運算一次格式化所有時間戳（SRT/VTT 共用）"""
+        total_ms = (np.asarray(seconds, dtype=np.float64) * 1000).astype(np.int64)
+        hours = total_ms // 3_600_000
+        minutes = (total_ms // 60_000) % 60
+        secs = (total_ms // 1000) % 60
+        millis = total_ms % 1000
+
+        template = "%02d:%02d:%02d" + millis_sep + "%03d"
+        return [
+            template % parts
+            for parts in zip(hours.tolist(), minutes.tolist(), secs.tolist(), millis.tolist())
+        ]
+
     def _save_as_srt(self, result: Dict, output_file: Path) -> None:
         """儲存為 SRT 字幕格式"""
-        with open(output_file, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(result["segments"], start=1):
-                start_time = self._format_timestamp_srt(segment["start"])
-                end_time = self._format_timestamp_srt(segment["end"])
+        segments = result["segments"]
+        start_times = self._format_timestamps_batch([s["start"] for s in segments], ",")
+        end_times = self._format_timestamps_batch([s["end"] for s in segments], ",")
 
-                f.write(f"{i}\n")
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{segment['text'].strip()}\n")
-                f.write("\n")
+        cues = [
+            f"{i}\n{start} --> {end}\n{segment['text'].strip()}\n"
+            for i, (segment, start, end) in enumerate(zip(segments, start_times, end_times), start=1)
+        ]
+        with open(output_file, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.write("\n".join(cues) + "\n")
 
     def _save_as_vtt(self, result: Dict, output_file: Path) -> None:
         """儲存為 VTT 字幕格式"""
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write("WEBVTT\n\n")
+        segments = result["segments"]
+        start_times = self._format_timestamps_batch([s["start"] for s in segments], ".")
+        end_times = self._format_timestamps_batch([s["end"] for s in segments], ".")
 
-            for segment in result["segments"]:
-                start_time = self._format_timestamp_vtt(segment["start"])
-                end_time = self._format_timestamp_vtt(segment["end"])
-
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{segment['text'].strip()}\n")
-                f.write("\n")
+        cues = [
+            f"{start} --> {end}\n{segment['text'].strip()}\n"
+            for segment, start, end in zip(segments, start_times, end_times)
+        ]
+        with open(output_file, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.write("WEBVTT\n\n" + "\n".join(cues) + "\n")
 
     def _save_as_json(self, result: Dict, output_file: Path) -> None:
-        """儲存為 JSON 格式"""
+        """儲存為 JSON 格式
+
+        orjson 可用時以 C 實作一次序列化成單一 bytes 緩衝再寫出
+        （OPT_SERIALIZE_NUMPY 處理 segment 內的 numpy 純量）；
+        否則退回標準庫 json，輸出格式相同（UTF-8、縮排 2）。
+        """
+        if orjson is not None:
+            data = orjson.dumps(
+                result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            )
+            with open(output_file, "wb") as f:
+                f.write(data)
+            return
+
         import json
 
         with open(output_file, "w", encoding="utf-8") as f:
@@ -5,16 +5,32 @@ Parallel Transcription Module
 """
 
 import logging
+import os
 import subprocess
 import threading
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 from faster_whisper import WhisperModel, utils as fw_utils
+
+try:  # faster-whisper >= 1.1：VAD 片段批次解碼
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:  # pragma: no cover - 舊版 faster-whisper
+    BatchedInferencePipeline = None
+
+try:  # 預先計算語音區間用（faster-whisper 內建 Silero VAD）
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+except ImportError:  # pragma: no cover - 舊版 faster-whisper
+    VadOptions = get_speech_timestamps = None
 import time
 
 logger = logging.getLogger(__name__)
 
+# int16 -> float32 正規化用倒數常數：乘法較除法便宜且可被 SIMD 向量化
+_INT16_SCALE = np.float32(1.0 / 32768.0)
+
 # Patch tqdm compatibility regression (tqdm>=4.67)
 if not hasattr(fw_utils.disabled_tqdm, "_lock"):
     fw_utils.disabled_tqdm._lock = threading.Lock()
@@ -28,10 +44,16 @@ class ParallelTranscriber:
         model_size: str = "medium",
         device: str = "cpu",
         compute_type: str = "int8",
-        max_workers: int = 6,
+        max_workers: Optional[int] = None,
         vad_parameters: Optional[Dict] = None,
         language: str = "zh",
-        beam_size: int = 5
+        beam_size: int = 1,
+        batch_size: int = 8,
+        condition_on_previous_text: bool = False,
+        word_timestamps: bool = False,
+        segment_callback: Optional[Callable[[int, Dict], None]] = None,
+        keep_audio: bool = False,
+        precomputed_vad: bool = True
     ):
         """
         初始化並行轉錄器
@@ -40,19 +62,83 @@ class ParallelTranscriber:
             model_size: Whisper 模型大小 (tiny, base, small, medium, large-v3)
             device: 設備類型 (cpu, cuda)
             compute_type: 計算精度 (int8, float16, float32)
-            max_workers: 最大並行工作數
+            max_workers: 最大並行工作數；None 時依實體核心數自動設定
+                （phys // 4，與模型的 cpu_threads 相乘約等於核心數，
+                避免 OMP 執行緒超訂或大機器閒置）
             vad_parameters: VAD 參數字典
             language: 語言代碼
-            beam_size: Beam search 大小
+            beam_size: Beam search 大小。預設 1（greedy）換取約 2-3 倍
+                decoder 吞吐，WER 僅小幅上升；對準確度敏感的場景可調回 5
+            condition_on_previous_text: 是否以前文作為解碼條件。預設
+                False，避免長音檔上的重複迴圈與卡住（吞吐導向建議值）
+            batch_size: 批次解碼大小（>1 時以 BatchedInferencePipeline
+                將多個 VAD 片段合批過 decoder，攤提 KV cache 與 matmul
+                啟動成本；設 1 退回逐片段解碼）
+            word_timestamps: 是否收集逐字時間戳。合併器只用 segment 級
+                start/end/text，逐字 dict 每片段可多出數千個 Python 物件，
+                預設關閉以降低聚合階段的峰值記憶體
+            segment_callback: 每個 segment 一離開 decoder 就以
+                (chunk_id, segment_dict) 呼叫（faster-whisper 的 segments
+                是 generator，逐段產出）。供進度 UI 或邊轉錄邊寫出使用；
+                在 worker 執行緒上執行，需自行保證執行緒安全
+            keep_audio: 轉錄後將整檔 16kHz float32 波形保留在
+                `last_audio`，供 diarizer 重用同一份解碼結果，
+                免去對原始音檔的第二次解碼＋重採樣
+            precomputed_vad: 在提交前（生產者端）先跑一次 Silero VAD，
+                將語音區間以 clip_timestamps 傳入並關閉 transcribe 內部的
+                vad_filter：VAD 移出 worker 的關鍵路徑、與轉錄重疊執行，
+                且全靜音片段可直接跳過解碼。僅在逐片段（非批次）模式
+                生效——批次模式依賴內部 VAD 切段組 batch
         """
         self.model_size = model_size
         self.device = device
         self.compute_type = compute_type
+
+        # worker 數 × 每模型 OMP 執行緒數應約等於實體核心數：
+        # 寫死的 worker 數在 4 核筆電上超訂、32 核伺服器上閒置
+        if max_workers is None:
+            max_workers = max(1, self._physical_cpu_count() // 4)
+            logger.info(f"Auto-tuned max_workers={max_workers}")
         self.max_workers = max_workers
+
+        # CTranslate2 每次推論的 OMP 執行緒數；尊重 OMP_NUM_THREADS
+        omp_threads = os.environ.get("OMP_NUM_THREADS")
+        self.cpu_threads = int(omp_threads) if omp_threads else 4
         self.vad_parameters = vad_parameters or {}
         self.language = language
         self.beam_size = beam_size
-        self._thread_local = threading.local()
+        self.batch_size = batch_size
+        self.condition_on_previous_text = condition_on_previous_text
+        self.word_timestamps = word_timestamps
+        self.segment_callback = segment_callback
+        self.keep_audio = keep_audio
+        self.precomputed_vad = precomputed_vad
+        # 最近一次 transcribe_chunks 的整檔波形（僅 keep_audio 時保留）
+        self.last_audio: Optional[np.ndarray] = None
+        self._use_batched = batch_size > 1 and BatchedInferencePipeline is not None
+        if batch_size > 1 and BatchedInferencePipeline is None:
+            logger.warning(
+                "BatchedInferencePipeline unavailable (faster-whisper < 1.1); "
+                "falling back to per-segment decoding"
+            )
+        if self._use_batched and max_workers > 2:
+            # 批次解碼已在模型內部吃滿 CTranslate2 的 OMP 執行緒，
+            # 過多 Python worker 只會造成 CPU 超訂
+            logger.info(
+                "Batched inference enabled; consider max_workers<=2 to avoid "
+                "CPU oversubscription (current: %d)", max_workers
+            )
+        # 所有 worker 共用單一模型：CTranslate2 模型執行緒安全且推論時
+        # 釋放 GIL，num_workers 讓其內部多工；相較每執行緒一份權重
+        # （medium int8 約 1.5GB）可省 (max_workers-1) 倍記憶體
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._use_precomputed_vad = (
+            precomputed_vad
+            and bool(self.vad_parameters)
+            and not self._use_batched
+            and get_speech_timestamps is not None
+        )
 
         logger.info(
             f"Parallel Transcriber initialized - "
@@ -60,84 +146,97 @@ class ParallelTranscriber:
             f"workers: {max_workers}, VAD enabled: {bool(vad_parameters)}"
         )
 
-    def _create_worker_model(self) -> WhisperModel:
+    def _create_model(self):
         """
-        創建工作線程的 Whisper 模型實例
+        創建共用的 Whisper 模型實例
 
         Returns:
-            WhisperModel: Whisper 模型實例
+            批次模式下為 BatchedInferencePipeline，否則為 WhisperModel
         """
         logger.debug(f"Loading Whisper model: {self.model_size}")
 
-        return WhisperModel(
+        model = WhisperModel(
             self.model_size,
             device=self.device,
-            compute_type=self.compute_type
+            compute_type=self.compute_type,
+            num_workers=self.max_workers,
+            cpu_threads=self.cpu_threads
         )
-
-    def _get_worker_model(self) -> WhisperModel:
-        """Lazily create a Whisper model per worker thread."""
-        model = getattr(self._thread_local, "model", None)
-        if model is None:
-            model = self._create_worker_model()
-            self._thread_local.model = model
+        if self._use_batched:
+            model = BatchedInferencePipeline(model=model)
         return model
 
+    def _get_model(self):
+        """Lazily create the shared Whisper model (thread-safe)."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._create_model()
+        return self._model
+
     def _extract_audio_chunk(
         self,
         audio_path: str,
-        chunk: Dict,
-        output_dir: Path
-    ) -> Optional[str]:
+        chunk: Dict
+    ) -> Optional[np.ndarray]:
         """
-        使用 ffmpeg 提取音檔片段
+        使用 ffmpeg 提取音檔片段（直接解碼進記憶體）
+
+        ffmpeg 將片段以 raw s16le 寫到 stdout，直接轉成 float32 陣列餵給
+        faster-whisper（其 transcribe 接受 ndarray），省去「寫 WAV →
+        faster-whisper 再讀回重新解碼」的整趟磁碟往返與臨時檔清理。
+        -ss 放在 -i 之前走 keyframe seek。
 
         Args:
             audio_path: 原始音檔路徑
             chunk: 片段資訊
-            output_dir: 輸出目錄
 
         Returns:
-            Optional[str]: 提取的音檔路徑，失敗返回 None
+            Optional[np.ndarray]: 16kHz 單聲道 float32 波形，失敗返回 None
         """
         chunk_id = chunk["chunk_id"]
         start = chunk["start"]
         duration = chunk["duration"]
 
-        # 生成輸出檔名
-        input_path = Path(audio_path)
-        output_filename = f"{input_path.stem}_chunk_{chunk_id:03d}.wav"
-        output_path = output_dir / output_filename
-
-        # 構建 ffmpeg 命令
+        # 構建 ffmpeg 命令（raw PCM 輸出到 stdout）
         ffmpeg_cmd = [
             "ffmpeg",
-            "-i", str(audio_path),
             "-ss", str(start),
+            "-i", str(audio_path),
             "-t", str(duration),
             "-ar", "16000",  # 16kHz 採樣率
             "-ac", "1",      # 單聲道
-            "-c:a", "pcm_s16le",  # WAV 格式
-            "-y",  # 覆蓋已存在檔案
-            str(output_path)
+            "-f", "s16le",   # raw PCM，不寫 RIFF 容器
+            "-loglevel", "error",
+            "-"
         ]
 
-        try:
-            logger.debug(f"Extracting chunk {chunk_id}: {start:.1f}s - {start+duration:.1f}s")
+        logger.debug(f"Extracting chunk {chunk_id}: {start:.1f}s - {start+duration:.1f}s")
 
-            result = subprocess.run(
+        # stderr 丟 DEVNULL：成功路徑不需要它，PIPE 會強迫 Python 把
+        # 整串輸出吸進記憶體。失敗時才重跑一次專門收集診斷訊息
+        result = subprocess.run(
+            ffmpeg_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=False
+        )
+
+        if result.returncode != 0:
+            retry = subprocess.run(
                 ffmpeg_cmd,
-                stdout=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
-                check=True
+                check=False
             )
+            stderr_text = retry.stderr.decode(errors="replace")[:500]
+            logger.error(f"Failed to extract chunk {chunk_id}: {stderr_text}")
+            return None
 
-            logger.debug(f"Chunk {chunk_id} extracted successfully: {output_path}")
-            return str(output_path)
+        audio = np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) * _INT16_SCALE
 
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Failed to extract chunk {chunk_id}: {e.stderr.decode()}")
-            return None
+        logger.debug(f"Chunk {chunk_id} extracted successfully: {len(audio)} samples")
+        return audio
 
     def _transcribe_single_chunk(
         self,
@@ -147,9 +246,9 @@ class ParallelTranscriber:
         轉錄單個音檔片段（在工作線程中執行）
 
         Args:
-            chunk_info: 包含音檔路徑和片段資訊的字典
+            chunk_info: 包含片段波形和片段資訊的字典
                 {
-                    "chunk_path": "path/to/chunk.wav",
+                    "audio": np.ndarray (16kHz 單聲道 float32),
                     "chunk": {"chunk_id": 0, "start": 0.0, ...},
                     "original_audio_path": "path/to/original.m4a"
                 }
@@ -157,31 +256,57 @@ class ParallelTranscriber:
         Returns:
             Dict: 轉錄結果
         """
-        chunk_path = chunk_info["chunk_path"]
+        audio = chunk_info["audio"]
         chunk = chunk_info["chunk"]
         chunk_id = chunk["chunk_id"]
 
         try:
             start_time = time.time()
 
-            # 創建模型實例（每個工作線程獨立且重用）
-            model = self._get_worker_model()
+            # 預計算 VAD 顯示整段皆靜音：不必喚醒 decoder
+            clip_timestamps = chunk_info.get("clip_timestamps")
+            if clip_timestamps is not None and not clip_timestamps:
+                logger.info(f"[Chunk {chunk_id}] No speech detected, skipping transcription")
+                return {
+                    "chunk_id": chunk_id,
+                    "chunk": chunk,
+                    "success": True,
+                    "segments": [],
+                    "language": self.language,
+                    "language_probability": 1.0,
+                    "duration": len(audio) / self.SAMPLE_RATE,
+                    "processing_time": time.time() - start_time,
+                    "vad_enabled": True
+                }
+
+            # 取得共用模型（首次呼叫時載入一次）
+            model = self._get_model()
 
             logger.info(f"[Chunk {chunk_id}] Starting transcription...")
 
-            # 執行轉錄
-            segments, info = model.transcribe(
-                chunk_path,
-                language=self.language,
-                beam_size=self.beam_size,
-                vad_filter=bool(self.vad_parameters),
-                vad_parameters=self.vad_parameters if self.vad_parameters else None
-            )
-
-            # 收集所有 segments
+            # 執行轉錄（直接餵 ndarray，faster-whisper 不需再解碼）
+            transcribe_kwargs = {
+                "language": self.language,
+                "beam_size": self.beam_size,
+                "condition_on_previous_text": self.condition_on_previous_text,
+                "vad_filter": bool(self.vad_parameters),
+                "vad_parameters": self.vad_parameters if self.vad_parameters else None,
+                "word_timestamps": self.word_timestamps,
+            }
+            if self._use_batched:
+                transcribe_kwargs["batch_size"] = self.batch_size
+            if clip_timestamps:
+                # 語音區間已算好：關閉內部 VAD，直接按區間解碼
+                transcribe_kwargs["clip_timestamps"] = clip_timestamps
+                transcribe_kwargs["vad_filter"] = False
+                transcribe_kwargs["vad_parameters"] = None
+            segments, info = model.transcribe(audio, **transcribe_kwargs)
+
+            # 逐段消費 decoder 的 generator：segment 一產出即可回報，
+            # 不必等整個片段解碼完（逐字資訊僅在啟用 word_timestamps 時物化）
             all_segments = []
             for segment in segments:
-                all_segments.append({
+                segment_dict = {
                     "start": segment.start,
                     "end": segment.end,
                     "text": segment.text,
@@ -193,15 +318,20 @@ class ParallelTranscriber:
                             "probability": word.probability
                         }
                         for word in (segment.words or [])
-                    ] if hasattr(segment, 'words') and segment.words else []
-                })
+                    ] if self.word_timestamps and getattr(segment, 'words', None) else []
+                }
+                all_segments.append(segment_dict)
+                if self.segment_callback is not None:
+                    try:
+                        self.segment_callback(chunk_id, segment_dict)
+                    except Exception as cb_exc:
+                        logger.warning(f"segment_callback raised: {cb_exc}")
 
             processing_time = time.time() - start_time
 
             result = {
                 "chunk_id": chunk_id,
                 "chunk": chunk,
-                "chunk_path": chunk_path,
                 "success": True,
                 "segments": all_segments,
                 "language": info.language,
@@ -211,6 +341,7 @@ class ParallelTranscriber:
                 "vad_enabled": bool(self.vad_parameters)
             }
 
+
             logger.info(
                 f"[Chunk {chunk_id}] Completed - "
                 f"{len(all_segments)} segments, "
@@ -224,17 +355,213 @@ class ParallelTranscriber:
             return {
                 "chunk_id": chunk_id,
                 "chunk": chunk,
-                "chunk_path": chunk_path,
                 "success": False,
                 "error": str(e),
                 "segments": []
             }
 
+    SAMPLE_RATE = 16000
+
+    @staticmethod
+    def _physical_cpu_count() -> int:
+        """實體核心數（psutil 可用時排除超執行緒，否則退回邏輯核心數）"""
+        try:
+            import psutil
+
+            count = psutil.cpu_count(logical=False)
+            if count:
+                return count
+        except ImportError:
+            pass
+        return os.cpu_count() or 4
+
+    def _decode_full_audio(self, audio_path: str) -> Optional[np.ndarray]:
+        """單趟解碼整個音檔為 16kHz 單聲道 float32 波形
+
+        逐片段呼叫 ffmpeg 會重複 open+seek 輸入容器 N 次；一次解碼後，
+        各片段（含重疊）只是對同一緩衝的樣本切片（zero-copy view）。
+        記憶體成本約 sample_rate*4 bytes/秒（60 分鐘 ≈ 230MB）。
+
+        優先走 faster-whisper 內建的 decode_audio（PyAV 行程內解碼，
+        不 fork 子行程）；不可用時退回 ffmpeg pipe。
+        """
+        try:
+            from faster_whisper.audio import decode_audio
+
+            return decode_audio(audio_path, sampling_rate=self.SAMPLE_RATE)
+        except Exception as exc:
+            logger.debug(f"decode_audio failed ({exc}); falling back to ffmpeg pipe")
+
+        cmd = [
+            "ffmpeg",
+            "-i", str(audio_path),
+            "-ar", str(self.SAMPLE_RATE),
+            "-ac", "1",
+            "-f", "s16le",
+            "-loglevel", "error",
+            "-"
+        ]
+        try:
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                check=False
+            )
+        except OSError as e:
+            logger.warning(f"Full-file decode failed ({e}); falling back to per-chunk extraction")
+            return None
+
+        if result.returncode != 0:
+            # 細部診斷交給逐片段提取的重試路徑收集
+            logger.warning(
+                f"Full-file decode exited with code {result.returncode}; "
+                f"falling back to per-chunk extraction"
+            )
+            return None
+
+        return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) * _INT16_SCALE
+
+    def _slice_chunk(self, full_audio: np.ndarray, chunk: Dict) -> np.ndarray:
+        """從整檔波形切出片段樣本區間（含重疊，無複製）"""
+        start_idx = int(round(chunk["start"] * self.SAMPLE_RATE))
+        end_idx = min(int(round(chunk["end"] * self.SAMPLE_RATE)), len(full_audio))
+        return full_audio[start_idx:end_idx]
+
+    def _stream_chunk_audio(self, audio_path: str, chunks: List[Dict]):
+        """串流解碼：每個片段的樣本一到齊就 yield（生產者端）
+
+        ffmpeg 依時間順序輸出 raw PCM；按片段結束位置逐段讀取 stdout，
+        讓第一個片段在整檔解碼完成前就能進入轉錄。解碼與轉錄重疊後，
+        總時長從 T_decode + T_transcribe 降為約 max(T_decode, T_transcribe)。
+
+        Yields:
+            (chunk, Optional[np.ndarray]): 波形為 None 表示該片段需走
+            逐片段提取的退路
+        """
+        cmd = [
+            "ffmpeg",
+            "-i", str(audio_path),
+            "-ar", str(self.SAMPLE_RATE),
+            "-ac", "1",
+            "-f", "s16le",
+            "-loglevel", "error",
+            "-"
+        ]
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL  # 不讀取就不可 PIPE，否則 ffmpeg 會塞住
+            )
+        except OSError as exc:
+            logger.warning(f"ffmpeg unavailable for streaming decode ({exc})")
+            full_audio = self._decode_full_audio(audio_path)
+            if self.keep_audio:
+                self.last_audio = full_audio
+            for chunk in chunks:
+                audio = self._slice_chunk(full_audio, chunk) if full_audio is not None else None
+                yield chunk, audio
+            return
+
+        buf = bytearray()
+        bytes_per_sample = 2
+        eof = False
+        completed = False
+
+        try:
+            for chunk in chunks:
+                start_byte = int(round(chunk["start"] * self.SAMPLE_RATE)) * bytes_per_sample
+                end_byte = int(round(chunk["end"] * self.SAMPLE_RATE)) * bytes_per_sample
+
+                while not eof and len(buf) < end_byte:
+                    data = proc.stdout.read(1 << 20)
+                    if not data:
+                        eof = True
+                        break
+                    buf.extend(data)
+
+                avail = len(buf) - (len(buf) % bytes_per_sample)
+                end_byte = min(end_byte, avail)
+                if end_byte <= start_byte:
+                    # 樣本未到齊（解碼提前中止）：退回逐片段提取
+                    yield chunk, None
+                    continue
+
+                audio = (
+                    np.frombuffer(bytes(buf[start_byte:end_byte]), dtype=np.int16)
+                    .astype(np.float32) * _INT16_SCALE
+                )
+                yield chunk, audio
+            completed = True
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+            if returncode != 0:
+                logger.warning(f"Streaming decode exited with code {returncode}")
+            elif completed and self.keep_audio:
+                avail = len(buf) - (len(buf) % bytes_per_sample)
+                self.last_audio = (
+                    np.frombuffer(bytes(buf[:avail]), dtype=np.int16)
+                    .astype(np.float32) * _INT16_SCALE
+                )
+
+    def _speech_clip_timestamps(self, audio: np.ndarray) -> Optional[List[float]]:
+        """以 Silero VAD 掃一次波形，回傳語音區間（秒，start/end 交錯）
+
+        失敗時回傳 None，呼叫端退回 transcribe 內部的 vad_filter。
+        """
+        try:
+            options = VadOptions(**self.vad_parameters)
+            spans = get_speech_timestamps(audio, vad_options=options)
+        except Exception as exc:
+            logger.debug(f"Precomputed VAD failed ({exc}); using in-transcribe vad_filter")
+            return None
+
+        clips: List[float] = []
+        for span in spans:
+            clips.append(span["start"] / self.SAMPLE_RATE)
+            clips.append(span["end"] / self.SAMPLE_RATE)
+        return clips
+
+    def _process_single_chunk(
+        self,
+        audio_path: str,
+        chunk: Dict,
+        full_audio: Optional[np.ndarray] = None
+    ) -> Dict:
+        """提取並轉錄單個片段（提取＋轉錄融合為一個工作單元）
+
+        整檔波形可用時直接切片；否則每個 worker 對自己的片段先 ffmpeg
+        提取、接著轉錄（各片段的 seek/解碼互相獨立，隨 worker 並行）。
+        """
+        if full_audio is not None:
+            audio = self._slice_chunk(full_audio, chunk)
+        else:
+            audio = self._extract_audio_chunk(audio_path, chunk)
+        if audio is None:
+            logger.error(f"Failed to extract chunk {chunk['chunk_id']}")
+            return {
+                "chunk_id": chunk["chunk_id"],
+                "chunk": chunk,
+                "success": False,
+                "error": "Audio extraction failed",
+                "segments": []
+            }
+
+        chunk_info = {
+            "audio": audio,
+            "chunk": chunk,
+            "original_audio_path": audio_path
+        }
+        if self._use_precomputed_vad:
+            chunk_info["clip_timestamps"] = self._speech_clip_timestamps(audio)
+        return self._transcribe_single_chunk(chunk_info)
+
     def transcribe_chunks(
         self,
         audio_path: str,
-        chunks: List[Dict],
-        output_dir: Optional[str] = None
+        chunks: List[Dict]
     ) -> List[Dict]:
         """
         並行轉錄所有音檔片段
@@ -242,7 +569,6 @@ class ParallelTranscriber:
         Args:
             audio_path: 原始音檔路徑
             chunks: 片段列表（由 AudioChunker 生成）
-            output_dir: 臨時檔案輸出目錄
 
         Returns:
             List[Dict]: 所有片段的轉錄結果列表
@@ -250,55 +576,44 @@ class ParallelTranscriber:
         logger.info(f"Starting parallel transcription of {len(chunks)} chunks")
         logger.info(f"Max workers: {self.max_workers}")
 
-        # 設定輸出目錄
-        if output_dir is None:
-            output_dir = Path(audio_path).parent / "chunks"
-        else:
-            output_dir = Path(output_dir)
-
-        output_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Chunk output directory: {output_dir}")
-
-        # Step 1: 提取所有音檔片段
-        logger.info("Step 1: Extracting audio chunks...")
-        chunk_paths = []
-
-        for chunk in chunks:
-            chunk_path = self._extract_audio_chunk(audio_path, chunk, output_dir)
-            if chunk_path:
-                chunk_paths.append({
-                    "chunk_path": chunk_path,
-                    "chunk": chunk,
-                    "original_audio_path": audio_path
-                })
-            else:
-                logger.error(f"Failed to extract chunk {chunk['chunk_id']}")
-
-        logger.info(f"Successfully extracted {len(chunk_paths)}/{len(chunks)} chunks")
-
-        # Step 2: 並行轉錄
-        logger.info("Step 2: Parallel transcription...")
+        self.last_audio = None
         start_time = time.time()
         results = []
 
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交所有任務
-            future_to_chunk = {
-                executor.submit(self._transcribe_single_chunk, chunk_info): chunk_info
-                for chunk_info in chunk_paths
-            }
-
-            # 收集結果
-            for future in as_completed(future_to_chunk):
-                chunk_info = future_to_chunk[future]
+            # 多片段：生產者（本執行緒）串流解碼並隨樣本到齊提交任務，
+            # 消費者（worker）同時轉錄已就緒的片段；單片段維持單次提取
+            futures = []
+            if len(chunks) > 1:
+                for chunk, audio in self._stream_chunk_audio(audio_path, chunks):
+                    if audio is not None:
+                        chunk_info = {
+                            "audio": audio,
+                            "chunk": chunk,
+                            "original_audio_path": audio_path
+                        }
+                        if self._use_precomputed_vad:
+                            # 生產者端先掃 VAD：與 worker 的轉錄重疊執行
+                            chunk_info["clip_timestamps"] = self._speech_clip_timestamps(audio)
+                        futures.append(executor.submit(self._transcribe_single_chunk, chunk_info))
+                    else:
+                        futures.append(executor.submit(self._process_single_chunk, audio_path, chunk))
+            else:
+                futures = [
+                    executor.submit(self._process_single_chunk, audio_path, chunk)
+                    for chunk in chunks
+                ]
+
+            # 依提交順序收集（等價 executor.map）：免去 future->chunk dict
+            # 與 as_completed 的逐完成喚醒，結果天然按 chunk_id 排序
+            for chunk, future in zip(chunks, futures):
                 try:
-                    result = future.result()
-                    results.append(result)
+                    results.append(future.result())
                 except Exception as e:
                     logger.error(f"Chunk transcription exception: {str(e)}")
                     results.append({
-                        "chunk_id": chunk_info["chunk"]["chunk_id"],
-                        "chunk": chunk_info["chunk"],
+                        "chunk_id": chunk["chunk_id"],
+                        "chunk": chunk,
                         "success": False,
                         "error": str(e),
                         "segments": []
@@ -306,9 +621,6 @@ class ParallelTranscriber:
 
         total_time = time.time() - start_time
 
-        # 按 chunk_id 排序
-        results.sort(key=lambda x: x["chunk_id"])
-
         # 統計資訊
         successful = sum(1 for r in results if r["success"])
         total_segments = sum(len(r["segments"]) for r in results)
@@ -10,6 +10,13 @@ from typing import Dict, Optional
 from pathlib import Path
 import time
 
+import numpy as np
+
+try:  # optional: JIT for the numeric speaker-assignment sweep
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional
+    njit = None
+
 from .vad.processor import VADProcessor
 from .chunking.chunker import AudioChunker
 from .parallel.transcriber import ParallelTranscriber
@@ -19,15 +26,53 @@ from .diarization import create_diarizer
 logger = logging.getLogger(__name__)
 
 
+def _assign_speaker_ids(
+    seg_starts: np.ndarray,
+    seg_ends: np.ndarray,
+    diar_starts: np.ndarray,
+    diar_ends: np.ndarray,
+    diar_ids: np.ndarray,
+) -> np.ndarray:
+    """雙指標重疊掃描的數值核心（可被 numba JIT）
+
+    僅操作 float64/int64 陣列與純量 min/max 運算，無 Python 物件，
+    numba 可編譯為機器碼；未安裝 numba 時以相同語意直譯執行。
+    回傳每個轉錄片段的說話者 id（-1 表示無重疊）。
+    """
+    out = np.full(seg_starts.shape[0], -1, dtype=np.int64)
+    n = diar_starts.shape[0]
+    j = 0
+    for i in range(seg_starts.shape[0]):
+        start = seg_starts[i]
+        end = seg_ends[i]
+        while j < n and diar_ends[j] <= start:
+            j += 1
+        best = 0.0
+        k = j
+        while k < n and diar_starts[k] < end:
+            s = diar_starts[k] if diar_starts[k] > start else start
+            e = diar_ends[k] if diar_ends[k] < end else end
+            overlap = e - s
+            if overlap > best:
+                best = overlap
+                out[i] = diar_ids[k]
+            k += 1
+    return out
+
+
+if njit is not None:
+    _assign_speaker_ids = njit(cache=True)(_assign_speaker_ids)
+
+
 class OptimizedTranscriptionPipeline:
     """優化的音檔轉錄流程"""
 
     def __init__(
         self,
         model_size: str = "medium",
-        device: str = "cpu",
-        compute_type: str = "int8",
-        max_workers: int = 6,
+        device: str = "auto",
+        compute_type: Optional[str] = None,
+        max_workers: Optional[int] = None,
         target_chunk_duration: int = 600,
         overlap_duration: int = 2,
         vad_preset: str = "meeting",
@@ -37,21 +82,34 @@ class OptimizedTranscriptionPipeline:
         diarization_model: str = "pyannote/speaker-diarization",
         diarization_auth_token: Optional[str] = None,
         diarization_allow_overlap: bool = False,
+        diarization_expected_speakers: Optional[int] = None,
     ):
         """
         初始化轉錄流程
 
         Args:
             model_size: Whisper 模型大小
-            device: 設備類型 (cpu, cuda)
-            compute_type: 計算精度 (int8, float16)
-            max_workers: 最大並行工作數
+            device: 設備類型 (auto, cpu, cuda)；auto 偵測到 CUDA 即用 GPU
+            compute_type: 計算精度 (int8, float16, int8_float16)；
+                None 時依設備選擇（cuda: int8_float16, cpu: int8）
+            max_workers: 最大並行工作數（None 時依實體核心數自動設定）
             target_chunk_duration: 目標片段長度（秒）
             overlap_duration: 片段重疊時間（秒）
             vad_preset: VAD 預設配置 (meeting, presentation, noisy)
             language: 語言代碼
             output_dir: 輸出目錄
         """
+        # 設備自動偵測：有 CUDA 時 GPU fp16/int8 吞吐遠高於 CPU int8，
+        # 且 GPU 上 kernel 序列執行，並行交給批次解碼而非多 worker
+        if device == "auto":
+            device = self._detect_device()
+        if compute_type is None:
+            compute_type = "int8_float16" if device == "cuda" else "int8"
+        batch_size = 16 if device == "cuda" else 8
+        if device == "cuda" and (max_workers is None or max_workers > 1):
+            logger.info("CUDA device detected; using max_workers=1 with batched inference")
+            max_workers = 1
+
         self.model_size = model_size
         self.device = device
         self.language = language
@@ -63,6 +121,7 @@ class OptimizedTranscriptionPipeline:
             "model_name": diarization_model,
             "auth_token": diarization_auth_token,
             "allow_overlap": diarization_allow_overlap,
+            "expected_speakers": diarization_expected_speakers,
         }
 
         # 初始化各個模組
@@ -83,7 +142,9 @@ class OptimizedTranscriptionPipeline:
             compute_type=compute_type,
             max_workers=max_workers,
             vad_parameters=vad_params,
-            language=language
+            language=language,
+            batch_size=batch_size,
+            keep_audio=enable_diarization
         )
 
         self.merger = TranscriptionMerger(
@@ -93,13 +154,25 @@ class OptimizedTranscriptionPipeline:
         logger.info("="*60)
         logger.info("Optimized Transcription Pipeline Initialized")
         logger.info(f"  Model: {model_size}")
-        logger.info(f"  Device: {device}")
-        logger.info(f"  Workers: {max_workers}")
+        logger.info(f"  Device: {device} ({compute_type})")
+        logger.info(f"  Workers: {self.transcriber.max_workers}")
         logger.info(f"  VAD Preset: {vad_preset}")
         logger.info(f"  Chunk Duration: {target_chunk_duration}s")
         logger.info(f"  Overlap: {overlap_duration}s")
         logger.info("="*60)
 
+    @staticmethod
+    def _detect_device() -> str:
+        """偵測可用設備（CUDA 可用即回傳 cuda，否則 cpu）"""
+        try:
+            import ctranslate2
+
+            if ctranslate2.get_cuda_device_count() > 0:
+                return "cuda"
+        except Exception as exc:  # pragma: no cover - environment dependent
+            logger.debug("CUDA detection failed (%s); using CPU", exc)
+        return "cpu"
+
     def process_audio(
         self,
         audio_path: str,
@@ -144,16 +217,12 @@ class OptimizedTranscriptionPipeline:
         logger.info("\n[Step 2/4] Creating audio chunks...")
         chunks = self.chunker.create_chunks(total_duration)
 
-        # Step 3: 並行轉錄所有片段
+        # Step 3: 並行轉錄所有片段（片段直接解碼進記憶體，無臨時檔）
         logger.info("\n[Step 3/4] Parallel transcription...")
 
-        # 設定輸出目錄
-        chunks_output_dir = self._get_chunks_output_dir(audio_path)
-
         chunk_results = self.transcriber.transcribe_chunks(
             audio_path=audio_path,
-            chunks=chunks,
-            output_dir=chunks_output_dir
+            chunks=chunks
         )
 
         # Step 4: 合併結果
@@ -180,8 +249,12 @@ class OptimizedTranscriptionPipeline:
         # 套用說話者區分
         diarizer = self._get_diarizer()
         if merged_result["success"] and diarizer:
+            # 重用轉錄階段已解碼的 16kHz 波形，免去 diarizer 的第二次
+            # 解碼＋重採樣（單片段路徑沒有整檔波形時傳 None，照舊讀檔）
             diarization_segments = diarizer.diarize(
-                audio_path, merged_result.get("segments")
+                audio_path,
+                merged_result.get("segments"),
+                waveform=self.transcriber.last_audio,
             )
             merged_result["speaker_segments"] = [
                 {
@@ -203,9 +276,6 @@ class OptimizedTranscriptionPipeline:
         if save_transcription and merged_result["success"]:
             self._save_results(audio_path, merged_result, output_formats)
 
-        # 清理臨時檔案
-        self._cleanup_temp_files(chunks_output_dir)
-
         # 最終摘要
         self._print_final_summary(merged_result, pipeline_total_time)
 
@@ -215,24 +285,47 @@ class OptimizedTranscriptionPipeline:
     def _assign_speakers_to_segments(segments, diarization_segments):
         """
         將說話者標籤對應到轉錄片段
-        """
 
-        def find_speaker(start: float, end: float):
-            overlaps = []
-            for segment in diarization_segments:
-                overlap = min(end, segment.end) - max(start, segment.start)
-                if overlap > 0:
-                    overlaps.append((overlap, segment.speaker))
-
-            if not overlaps:
-                return None
-
-            overlaps.sort(reverse=True)
-            return overlaps[0][1]
+        兩邊皆按時間排序，雙指標掃描 O(N+M)。純數值部分抽成
+        `_assign_speaker_ids`：說話者標籤先 intern 成 int id、時間戳
+        轉成 float64 陣列，讓 numba（可用時）把內層迴圈編譯成機器碼，
+        長對話上比直譯器快一到兩個數量級。
+        """
+        if not segments or not diarization_segments:
+            for segment in segments:
+                segment["speaker"] = "Speaker-Unknown"
+            return segments
+
+        m = len(diarization_segments)
+        labels: list = []
+        label_index: Dict[str, int] = {}
+        diar_ids = np.empty(m, dtype=np.int64)
+        for i, diar in enumerate(diarization_segments):
+            idx = label_index.get(diar.speaker)
+            if idx is None:
+                idx = len(labels)
+                label_index[diar.speaker] = idx
+                labels.append(diar.speaker)
+            diar_ids[i] = idx
+
+        diar_starts = np.fromiter((d.start for d in diarization_segments), dtype=np.float64, count=m)
+        diar_ends = np.fromiter((d.end for d in diarization_segments), dtype=np.float64, count=m)
+
+        n = len(segments)
+        seg_starts = np.fromiter((s["start"] for s in segments), dtype=np.float64, count=n)
+        seg_ends = np.fromiter((s["end"] for s in segments), dtype=np.float64, count=n)
+
+        # merger 按 chunk_id 串接 segments，重疊視窗附近可能出現輕微亂序，
+        # 而掃描核心假設 start 遞增：先 argsort 跑核心，再把結果映回原順序
+        order = np.argsort(seg_starts, kind="stable")
+        sorted_ids = _assign_speaker_ids(
+            seg_starts[order], seg_ends[order], diar_starts, diar_ends, diar_ids
+        )
+        ids = np.empty_like(sorted_ids)
+        ids[order] = sorted_ids
 
-        for segment in segments:
-            speaker = find_speaker(segment["start"], segment["end"])
-            segment["speaker"] = speaker or "Speaker-Unknown"
+        for segment, speaker_id in zip(segments, ids.tolist()):
+            segment["speaker"] = labels[speaker_id] if speaker_id >= 0 else "Speaker-Unknown"
 
         return segments
 
@@ -247,6 +340,7 @@ class OptimizedTranscriptionPipeline:
                     model_name=self._diarization_config["model_name"],
                     use_auth_token=self._diarization_config["auth_token"],
                     allow_overlap=self._diarization_config["allow_overlap"],
+                    expected_speakers=self._diarization_config["expected_speakers"],
                 )
             except RuntimeError as exc:
                 self.diarization_error = str(exc)
@@ -258,7 +352,10 @@ class OptimizedTranscriptionPipeline:
 
     def _get_audio_info(self, audio_path: str) -> Dict:
         """
-        使用 ffprobe 取得音檔資訊
+        取得音檔資訊（優先 PyAV，退回 ffprobe）
+
+        PyAV（faster-whisper 已依賴）在行程內開容器讀 header，免去
+        fork+exec ffprobe 與 libav 重新初始化的固定成本（~20-80ms）。
 
         Args:
             audio_path: 音檔路徑
@@ -266,6 +363,20 @@ class OptimizedTranscriptionPipeline:
         Returns:
             Dict: 音檔資訊
         """
+        try:
+            import av
+
+            with av.open(audio_path) as container:
+                if container.duration:
+                    return {
+                        "success": True,
+                        "duration": float(container.duration * av.time_base),
+                        "size": Path(audio_path).stat().st_size,
+                        "path": audio_path
+                    }
+        except Exception as exc:
+            logger.debug(f"PyAV probe failed ({exc}); falling back to ffprobe")
+
         try:
             cmd = [
                 "ffprobe",
@@ -278,7 +389,7 @@ class OptimizedTranscriptionPipeline:
             result = subprocess.run(
                 cmd,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,  # 只用 stdout；不讓 Python 吸無用輸出
                 check=True
             )
 
@@ -300,18 +411,6 @@ class OptimizedTranscriptionPipeline:
                 "error": str(e)
             }
 
-    def _get_chunks_output_dir(self, audio_path: str) -> str:
-        """取得片段輸出目錄"""
-        if self.output_dir:
-            base_dir = Path(self.output_dir)
-        else:
-            base_dir = Path(audio_path).parent
-
-        audio_name = Path(audio_path).stem
-        chunks_dir = base_dir / f"{audio_name}_chunks"
-
-        return str(chunks_dir)
-
     def _save_results(
         self,
         audio_path: str,
@@ -332,20 +431,6 @@ class OptimizedTranscriptionPipeline:
             output_file = f"{output_base}_transcription.{fmt}"
             self.merger.save_to_file(result, output_file, format=fmt)
 
-    def _cleanup_temp_files(self, chunks_dir: str) -> None:
-        """清理臨時片段檔案"""
-        logger.info("\nCleaning up temporary files...")
-
-        chunks_path = Path(chunks_dir)
-
-        if chunks_path.exists():
-            import shutil
-            try:
-                shutil.rmtree(chunks_path)
-                logger.info(f"Removed temporary directory: {chunks_path}")
-            except Exception as e:
-                logger.warning(f"Failed to remove temp directory: {str(e)}")
-
     def _print_final_summary(self, result: Dict, pipeline_time: float) -> None:
         """列印最終摘要"""
         logger.info("\n" + "="*60)
@@ -388,8 +473,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Optimized Audio Transcription Pipeline")
     parser.add_argument("--audio", required=True, help="Path to audio file")
     parser.add_argument("--model", default="medium", help="Whisper model size")
-    parser.add_argument("--device", default="cpu", help="Device (cpu/cuda)")
-    parser.add_argument("--workers", type=int, default=6, help="Number of parallel workers")
+    parser.add_argument("--device", default="auto", help="Device (auto/cpu/cuda)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of parallel workers (default: auto)")
     parser.add_argument("--vad-preset", default="meeting", help="VAD preset (meeting/presentation/noisy)")
     parser.add_argument("--output-dir", help="Output directory")
     parser.add_argument("--formats", nargs="+", default=["txt", "json"], help="Output formats")
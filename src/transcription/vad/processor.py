@@ -5,11 +5,41 @@ VAD (Voice Activity Detection) Processor Module
 """
 
 import logging
+from types import MappingProxyType
 from typing import List, Dict, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# 預設 VAD 參數為純查表資料，提升到模組層級凍結（MappingProxyType），
+# 避免每次呼叫 get_preset_parameters 重建整組 dict
+_VAD_PRESETS = MappingProxyType({
+    "meeting": {
+        "threshold": 0.5,
+        "min_speech_duration_ms": 250,
+        "min_silence_duration_ms": 500,
+        "speech_pad_ms": 400
+    },
+    "presentation": {
+        "threshold": 0.6,
+        "min_speech_duration_ms": 500,
+        "min_silence_duration_ms": 1000,
+        "speech_pad_ms": 300
+    },
+    "noisy": {
+        "threshold": 0.7,
+        "min_speech_duration_ms": 500,
+        "min_silence_duration_ms": 800,
+        "speech_pad_ms": 500
+    },
+    "default": {
+        "threshold": 0.5,
+        "min_speech_duration_ms": 250,
+        "min_silence_duration_ms": 500,
+        "speech_pad_ms": 400
+    }
+})
+
 
 class VADProcessor:
     """VAD 語音活動檢測處理器"""
@@ -87,37 +117,10 @@ class VADProcessor:
                 - "default": 預設配置
 
         Returns:
-            Dict: VAD 參數字典
+            Dict: VAD 參數字典（複本，呼叫端可自由修改）
         """
-        presets = {
-            "meeting": {
-                "threshold": 0.5,
-                "min_speech_duration_ms": 250,
-                "min_silence_duration_ms": 500,
-                "speech_pad_ms": 400
-            },
-            "presentation": {
-                "threshold": 0.6,
-                "min_speech_duration_ms": 500,
-                "min_silence_duration_ms": 1000,
-                "speech_pad_ms": 300
-            },
-            "noisy": {
-                "threshold": 0.7,
-                "min_speech_duration_ms": 500,
-                "min_silence_duration_ms": 800,
-                "speech_pad_ms": 500
-            },
-            "default": {
-                "threshold": 0.5,
-                "min_speech_duration_ms": 250,
-                "min_silence_duration_ms": 500,
-                "speech_pad_ms": 400
-            }
-        }
-
-        params = presets.get(preset, presets["default"])
-        logger.info(f"Using VAD preset '{preset}': {params}")
+        params = dict(_VAD_PRESETS.get(preset, _VAD_PRESETS["default"]))
+        logger.debug(f"Using VAD preset '{preset}': {params}")
 
         return params
 